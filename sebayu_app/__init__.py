@@ -38,10 +38,29 @@ def create_app():
     app.register_blueprint(editor_bp)
     app.register_blueprint(chatbot_bp)
 
-    # Inisialisasi database saat aplikasi dibuat
-    from .database import init_db
+    # Inisialisasi database saat aplikasi dibuat (+ kembalikan koneksi ke pool tiap akhir request)
+    from .database import init_db, init_app as init_db_app
+    init_db_app(app)
     with app.app_context():
         init_db()
 
+    # CLI: `flask --app app reclean` → bersihkan ulang seluruh arsip transkrip
+    @app.cli.command("reclean")
+    def reclean_command():
+        from .utils import reclean_all_transcripts
+        updated = reclean_all_transcripts(lambda pct, msg: print(f"[{pct:3d}%] {msg}"))
+        print(f"Selesai: {updated} transkrip diperbarui.")
+
+    # CLI: `flask --app app rebuild-request-stats` → hitung ulang agregat leaderboard request lagu
+    @app.cli.command("rebuild-request-stats")
+    def rebuild_request_stats_command():
+        from .database import rebuild_request_stats
+        rebuild_request_stats()
+        print("Agregat request lagu dihitung ulang.")
+
+    # Muat model Whisper (WHISPER_PRELOAD) di background
+    from .utils import preload_models
+    preload_models()
+
     log.info("Flask app instance created and blueprints registered.")
     return app
\ No newline at end of file
@@ -0,0 +1,261 @@
+# my_flask_app/sebayu_app/bench.py
+"""
+Benchmark ringan (tanpa dependensi tambahan), jalankan dari root proyek:
+
+    python -m sebayu_app.bench minutes
+    python -m sebayu_app.bench clean
+    python -m sebayu_app.bench summary
+    python -m sebayu_app.bench nowplaying
+    python -m sebayu_app.bench chat
+"""
+import json
+import random
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .textclean import clean_text_id, FILLERS, REPLACEMENTS, RE_LAUGH, RE_EMOJI
+from .chat_router import IntentRouter
+from .nowplaying import NowPlayingCache
+from .summarizer import summarize, summarize_many
+from .utils import local_summarize_bullets, extract_minutes_rule_based, fill_minutes_buckets, _classify_line, _compile_keysets, _split_candidates
+
+_WORDS = (
+    "rapat anggaran disepakati bersama tindak lanjut paling lambat minggu depan Budi ditugaskan menyusun "
+    "laporan kendala jaringan arahan pimpinan catatan informasi dinas kominfo kabupaten tegal program radio "
+    "siaran jadwal koordinasi OPD revisi dokumen RKPD KUA PPAS verifikasi lapangan pengadaan vendor"
+).split()
+
+def synthetic_sentences(n: int, seed: int = 7, vocab: int = 0) -> list[str]:
+    """`n` kalimat acak; `vocab` > 0 membatasi jumlah kalimat unik (simulasi pengulangan)."""
+    rnd = random.Random(seed)
+    pool = None
+    if vocab:
+        pool = [" ".join(rnd.choices(_WORDS, k=rnd.randint(6, 18))).capitalize() + "." for _ in range(vocab)]
+    return [
+        rnd.choice(pool) if pool else " ".join(rnd.choices(_WORDS, k=rnd.randint(6, 18))).capitalize() + "."
+        for _ in range(n)
+    ]
+
+def _timeit(fn, repeat: int = 3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+def _fill_buckets_legacy(classified, max_each: int) -> dict:
+    """Versi lama: sort penuh + cek duplikat dengan list baru per kandidat (O(n·k))."""
+    buckets = {k: [] for k in ["keputusan", "tindak_lanjut", "isu", "arahan", "catatan"]}
+    for label, _, pay in sorted(classified, key=lambda x: x[1], reverse=True):
+        if len(buckets[label]) < max_each and pay["text"] not in [p["text"] for p in buckets[label]]:
+            buckets[label].append(pay)
+    return buckets
+
+def bench_minutes(sizes=(2_500, 5_000, 10_000, 20_000, 40_000)):
+    matcher = _compile_keysets(None)
+    print(f"{'kalimat':>8} {'ekstraksi':>10} {'µs/kal':>7} | {'isi bucket':>10} {'legacy':>9}  (tanpa batas max_each)")
+    for n in sizes:
+        text = " ".join(synthetic_sentences(n, vocab=n // 2))
+        t_all = _timeit(lambda: extract_minutes_rule_based("", text, max_each=50), repeat=1)
+        classified = [_classify_line(ln, matcher) for ln in _split_candidates(text)]
+        t_fill = _timeit(lambda: fill_minutes_buckets(classified, sys.maxsize))
+        t_old = _timeit(lambda: _fill_buckets_legacy(classified, sys.maxsize), repeat=1) if n <= 20_000 else float("nan")
+        print(f"{n:>8} {t_all:>9.3f}s {t_all / n * 1e6:>7.1f} | {t_fill * 1000:>8.1f}ms {t_old * 1000:>7.0f}ms")
+
+# --- clean_text_id versi sebelum precompile, sebagai pembanding ---
+def _legacy_strip_fillers(sentence: str) -> str:
+    s = sentence.strip()
+    for _ in range(3):
+        low = s.lower()
+        for f in sorted(FILLERS, key=len, reverse=True):
+            if low.startswith(f + " "):
+                s = s[len(f):].lstrip(); low = s.lower()
+        for f in sorted(FILLERS, key=len, reverse=True):
+            if low.endswith(" " + f):
+                s = s[:-len(f)].rstrip(); low = s.lower()
+    return s
+
+def _legacy_normalize_token(tok: str) -> str:
+    t = RE_LAUGH.sub("", tok)
+    t = RE_EMOJI.sub("", t)
+    t = t.replace("…", "...")
+    return re.sub(r"(.)\1{2,}", r"\1\1", t)
+
+def _legacy_clean_text_id(text: str, aggressive: bool = True) -> str:
+    if not text or not text.strip():
+        return text
+    out = []
+    for s in re.split(r"(?<=[.!?])\s+|\n+", text):
+        if not s.strip():
+            continue
+        toks = [_legacy_normalize_token(t) for t in re.split(r"\s+", s) if t]
+        norm = []
+        for t in toks:
+            low = t.lower()
+            if low in REPLACEMENTS:
+                if REPLACEMENTS[low]:
+                    norm.extend(REPLACEMENTS[low].split())
+            else:
+                norm.append(t)
+        pruned = [t for t in norm if not (t.lower() in FILLERS and len(norm) <= 5)]
+        s2 = _legacy_strip_fillers(" ".join(pruned))
+        s2 = re.sub(r"\b(?:terus|lalu|jadi|nah)\b\s*(?:,|\.|$)", ".", s2, flags=re.I)
+        s2 = re.sub(r"\s+,", ",", s2)
+        s2 = re.sub(r"\s+\.", ".", s2)
+        s2 = re.sub(r"\s+", " ", s2).strip()
+        if s2:
+            out.append(s2)
+    cleaned = "\n".join(out)
+    if aggressive:
+        cleaned = "\n".join([ln for ln in cleaned.splitlines() if len(ln.strip()) >= 3])
+    return cleaned
+
+def synthetic_transcript(hours: float, seed: int = 11) -> str:
+    """Transkrip lisan ±130 kata/menit dengan filler, singkatan, tawa, dan huruf berulang."""
+    rnd = random.Random(seed)
+    noise = sorted(FILLERS) + sorted(REPLACEMENTS) + ["wkwkwk", "hahaha", "mantaaap", "ok…"]
+    words = []
+    for _ in range(int(hours * 60 * 130)):
+        words.append(rnd.choice(noise) if rnd.random() < 0.25 else rnd.choice(_WORDS))
+        if rnd.random() < 0.07:
+            words[-1] += rnd.choice([".", ",", "?"])
+    return " ".join(words)
+
+def bench_clean(hours=(1, 3)):
+    for h in hours:
+        text = synthetic_transcript(h)
+        t_old = _timeit(lambda: _legacy_clean_text_id(text), repeat=1)
+        t_new = _timeit(lambda: clean_text_id(text))
+        same = _legacy_clean_text_id(text) == clean_text_id(text)
+        print(f"{h} jam ({len(text) // 1024} KB): lama {t_old:.2f}s, baru {t_new:.2f}s "
+              f"(x{t_old / t_new:.1f}), hasil identik: {same}")
+
+def bench_summary(hours=(1, 4), batch=40):
+    for h in hours:
+        text = clean_text_id(synthetic_transcript(h))
+        t_kw = _timeit(lambda: local_summarize_bullets(text))
+        t_tf = _timeit(lambda: summarize(text, mode="tfidf"))
+        t_tr = _timeit(lambda: summarize(text, mode="textrank"))
+        print(f"{h} jam: keyword {t_kw * 1000:.0f}ms, tfidf {t_tf * 1000:.0f}ms, textrank {t_tr * 1000:.0f}ms")
+    texts = [clean_text_id(synthetic_transcript(0.5, seed=i)) for i in range(batch)]
+    t_many = _timeit(lambda: summarize_many(texts, mode="textrank"), repeat=1)
+    print(f"batch {batch} × 30 menit (textrank): {t_many:.2f}s")
+
+def stub_nowplaying_server(delay: float = 0.05):
+    """Server stub AzuraCast lokal (port acak). Return (server, url, hits) — hits[0] = jumlah request masuk."""
+    hits = [0]
+    body = json.dumps({
+        "now_playing": {"song": {"title": "Judul Uji", "artist": "Artis Uji"}, "live": {"is_live": False}},
+        "listeners": {"current": 42},
+    }).encode()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            hits[0] += 1
+            time.sleep(delay)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/api/nowplaying/sebayu", hits
+
+def bench_nowplaying(calls=2_000, threads=32, seconds=2.0):
+    import requests
+    server, url, hits = stub_nowplaying_server()
+    try:
+        def measure(fn, n):
+            lat = []
+            def one(_):
+                t = time.perf_counter(); fn(); lat.append(time.perf_counter() - t)
+            t0 = time.perf_counter()
+            with ThreadPoolExecutor(threads) as ex:
+                list(ex.map(one, range(n)))
+            lat.sort()
+            return time.perf_counter() - t0, lat[len(lat) // 2], lat[int(len(lat) * 0.99)]
+
+        hits[0] = 0
+        n_old = calls // 10
+        total, p50, p99 = measure(lambda: requests.get(url, timeout=6).json(), n_old)
+        print(f"tanpa cache: {n_old} pesan → {hits[0]} request upstream, {total:.2f}s, "
+              f"p50 {p50 * 1000:.1f}ms, p99 {p99 * 1000:.1f}ms")
+
+        hits[0] = 0
+        cache = NowPlayingCache(url, ttl=0.5, max_stale=5)
+        deadline = time.perf_counter() + seconds
+        n = 0
+        while time.perf_counter() < deadline:  # lonjakan berkelanjutan melewati beberapa TTL
+            total, p50, p99 = measure(cache.get, calls)
+            n += calls
+        print(f"cache (ttl 0.5s): {n} pesan dalam ±{seconds:.0f}s → {hits[0]} request upstream, "
+              f"p50 {p50 * 1e6:.0f}µs, p99 {p99 * 1e6:.0f}µs, stats {cache.stats()}")
+    finally:
+        server.shutdown()
+
+_CHAT_MESSAGES = [
+    "jadwal", "jadwal hari ini apa?", "status jadwal", "siaran sekarang", "lagu sekarang dong",
+    "request Separuh Aku - NOAH", "reqeust Kangen - Dewa 19", "jadwl", "statsu", "halo admin apa kabar semua",
+]
+
+def _chat_router_with(n_extra: int) -> IntentRouter:
+    router = IntentRouter(fallback=lambda m: "?")
+    router.add("request", lambda m: m.arg, keywords=["request", "req"], prefix=True)
+    router.add("help", lambda m: "help", exact=["help"], keywords=["help", "bantuan"])
+    router.add("jadwal", lambda m: "jadwal", keywords=["jadwal", "acara"])
+    router.add("siaran", lambda m: "siaran", keywords=["siaran", "on air"])
+    router.add("lagu", lambda m: "lagu", keywords=["lagu", "status", "now playing"])
+    rnd = random.Random(n_extra)
+    for i in range(n_extra):
+        kws = ["".join(rnd.choices("bcdfghjkmnprstvwz", k=rnd.randint(5, 9))) for _ in range(3)]
+        router.add(f"cmd{i}", lambda m: "cmd", keywords=kws)
+    return router
+
+def _chat_chain_with(n_extra: int):
+    """Pembanding gaya if/elif: cek substring satu per satu sesuai urutan perintah."""
+    rnd = random.Random(n_extra)
+    chain = [("jadwal", "jadwal"), ("siaran", "siaran"), ("lagu", "lagu"), ("status", "lagu")]
+    for i in range(n_extra):
+        chain += [("".join(rnd.choices("bcdfghjkmnprstvwz", k=rnd.randint(5, 9))), f"cmd{i}") for _ in range(3)]
+
+    def route(text):
+        low = text.lower()
+        for kw, name in chain:
+            if kw in low:
+                return name
+        return None
+    return route
+
+def bench_chat(sizes=(0, 100, 1_000, 10_000), rounds=2_000):
+    msgs = _CHAT_MESSAGES * (rounds // len(_CHAT_MESSAGES))
+    print(f"{'perintah':>9} | {'router µs/pesan':>15} | {'rantai if/elif µs/pesan':>23}")
+    for n in sizes:
+        router, chain = _chat_router_with(n), _chat_chain_with(n)
+        t_router = _timeit(lambda: [router.route(m) for m in msgs])
+        t_chain = _timeit(lambda: [chain(m) for m in msgs], repeat=1)
+        print(f"{n + 5:>9} | {t_router / len(msgs) * 1e6:>15.1f} | {t_chain / len(msgs) * 1e6:>23.1f}")
+    router = _chat_router_with(0)
+    for m in _CHAT_MESSAGES:
+        r = router.route(m)
+        print(f"  {m!r:<32} → {r.intent}{' (typo)' if r.fuzzy else ''}{f' arg={r.arg!r}' if r.arg else ''}")
+
+BENCHES = {"minutes": bench_minutes, "clean": bench_clean, "summary": bench_summary,
+           "nowplaying": bench_nowplaying, "chat": bench_chat}
+
+if __name__ == "__main__":
+    names = sys.argv[1:] or list(BENCHES)
+    for name in names:
+        print(f"== {name} ==")
+        BENCHES[name]()
@@ -0,0 +1,176 @@
+# my_flask_app/sebayu_app/chat_router.py
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+RE_CHAT_TOKEN = re.compile(r"[/\w]+")
+CHAT_SUFFIXES = ("nya", "lah", "kah", "dong", "pun")  # "jadwalnya", "laguku" tidak; "statusnya" ya
+# Kata kunci DAN kata masukan lebih pendek dari ini harus persis: kata pendek terlalu mudah
+# berjarak 1 edit dari kata umum ("cara" = "acara" kurang satu huruf, "lagi" ~ "lagu").
+FUZZY_MIN_LEN = 5
+# Kata umum ≥ FUZZY_MIN_LEN huruf yang berjarak 1 edit dari kata kunci chatbot tapi bukan typo
+# (tests/test_chat_router.py memastikan tiap entri memang akan terkoreksi tanpa daftar ini)
+CHAT_FUZZY_STOPWORDS = frozenset("""
+statis bantuin siarkan
+""".split())
+
+@dataclass
+class ChatMessage:
+    text: str                       # pesan asli (strip)
+    lower: str
+    tokens: List[str] = field(default_factory=list)
+    intent: Optional[str] = None
+    arg: str = ""                   # sisa pesan setelah perintah prefix ("request <arg>")
+    fuzzy: bool = False             # intent ditemukan lewat koreksi typo
+
+@dataclass
+class _Intent:
+    name: str
+    handler: Callable[[ChatMessage], str]
+    prefix: bool                    # perintah harus kata pertama; sisa pesan jadi argumen
+
+def _deletes(word: str) -> Iterable[str]:
+    return {word[:i] + word[i + 1:] for i in range(len(word))}
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """Jarak Damerau (OSA) ≤ 1: satu sisip/hapus/ganti/tukar dua huruf bersebelahan."""
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    i = 0
+    while i < min(la, lb) and a[i] == b[i]:
+        i += 1
+    if la == lb:
+        return a[i + 1:] == b[i + 1:] or (a[i:i + 2] == b[i:i + 2][::-1] and a[i + 2:] == b[i + 2:])
+    return a[i + 1:] == b[i:] if la > lb else a[i:] == b[i + 1:]
+
+class IntentRouter:
+    """
+    Routing pesan chat ke handler lewat tabel perintah yang dikompilasi sekali.
+    - `exact`: seluruh pesan harus sama persis (mis. "help", "/start").
+    - `keywords`: kata/frasa di mana saja dalam pesan; kata kunci PALING KIRI yang menentukan intent
+      ("status jadwal" → lagu, "jadwal status" → jadwal), bukan urutan if/elif.
+    - `prefix=True`: kata kunci hanya berlaku sebagai kata pertama, sisa pesan jadi `msg.arg`
+      ("request Lagu - Artis" tidak lagi nyasar ke status lagu); prefix menang atas kata kunci lain.
+    - Typo: bila tidak ada kata yang cocok persis, dicoba koreksi 1 edit (indeks hapus-satu-huruf
+      ala SymSpell), jadi biaya per kata konstan berapa pun jumlah perintah. Kata kunci maupun kata
+      masukan harus ≥ FUZZY_MIN_LEN huruf ("cara" tidak dikoreksi jadi "acara"), dan kata umum di
+      `no_fuzzy` ("statis") tidak pernah dianggap typo.
+    Handler: `fn(msg: ChatMessage) -> str`, didaftarkan dengan `add()` atau dekorator `intent()`.
+    """
+
+    def __init__(self, fallback: Callable[[ChatMessage], str], empty: Callable[[ChatMessage], str] | None = None,
+                 no_fuzzy: Iterable[str] = CHAT_FUZZY_STOPWORDS):
+        self._fallback = fallback
+        self._no_fuzzy = frozenset(no_fuzzy)
+        self._empty = empty or fallback
+        self._intents: Dict[str, _Intent] = {}
+        self._order: Dict[str, int] = {}
+        self._exact: Dict[str, str] = {}
+        # kata pertama → [(frasa sebagai tuple kata, intent)], frasa terpanjang dulu
+        self._phrases: Dict[str, List[Tuple[Tuple[str, ...], str]]] = {}
+        self._fuzzy: Dict[str, List[str]] = {}   # varian hapus-satu-huruf → [kata kunci]
+
+    def add(self, name: str, handler: Callable[[ChatMessage], str], *, keywords: Iterable[str] = (),
+            exact: Iterable[str] = (), prefix: bool = False):
+        self._intents[name] = _Intent(name, handler, prefix)
+        self._order.setdefault(name, len(self._order))
+        for e in exact:
+            self._exact.setdefault(e.strip().lower(), name)
+        for kw in keywords:
+            words = tuple(RE_CHAT_TOKEN.findall(kw.lower()))
+            if not words:
+                continue
+            lst = self._phrases.setdefault(words[0], [])
+            if all(p != words for p, _ in lst):
+                lst.append((words, name))
+                lst.sort(key=lambda e: (-len(e[0]), self._order[e[1]]))
+            if len(words[0]) >= FUZZY_MIN_LEN:
+                for d in _deletes(words[0]) | {words[0]}:
+                    variants = self._fuzzy.setdefault(d, [])
+                    if words[0] not in variants:
+                        variants.append(words[0])
+
+    def intent(self, name: str, **kw):
+        def deco(fn):
+            self.add(name, fn, **kw)
+            return fn
+        return deco
+
+    def _lookup_word(self, tok: str) -> Optional[str]:
+        if tok in self._phrases:
+            return tok
+        for suf in CHAT_SUFFIXES:
+            if tok.endswith(suf) and tok[:-len(suf)] in self._phrases:
+                return tok[:-len(suf)]
+        return None
+
+    def _correct_word(self, tok: str, prefix_only: bool = False) -> Optional[str]:
+        # kata yang sudah dikenal (kata kunci / kata umum) bukan typo
+        if len(tok) < FUZZY_MIN_LEN or tok in self._no_fuzzy or tok in self._phrases:
+            return None
+        seen = set()
+        best = None
+        for d in _deletes(tok) | {tok}:
+            for kw in self._fuzzy.get(d, ()):
+                if kw in seen:
+                    continue
+                seen.add(kw)
+                names = [n for _, n in self._phrases[kw] if self._intents[n].prefix or not prefix_only]
+                if names and _within_one_edit(tok, kw):
+                    rank = min(self._order[n] for n in names)
+                    if best is None or rank < best[0]:
+                        best = (rank, kw)
+        return best[1] if best else None
+
+    def _match_at(self, tokens: List[str], i: int, head: str) -> Optional[Tuple[str, int]]:
+        """(intent, jumlah kata) untuk frasa yang diawali `head` di posisi i."""
+        for words, name in self._phrases[head]:
+            n = len(words)
+            if tuple(tokens[i + 1:i + n]) == words[1:]:
+                if self._intents[name].prefix and i != 0:
+                    continue
+                return name, n
+        return None
+
+    def route(self, text: str) -> ChatMessage:
+        t = (text or "").strip()
+        msg = ChatMessage(text=t, lower=t.lower())
+        if not t:
+            return msg
+        name = self._exact.get(msg.lower)
+        if name:
+            msg.intent = name
+            return msg
+        msg.tokens = tokens = RE_CHAT_TOKEN.findall(msg.lower)
+        if not tokens:
+            return msg
+        for fuzzy, lookup in ((False, self._lookup_word), (True, self._correct_word)):
+            for i, tok in enumerate(tokens):
+                head = lookup(tok)
+                hit = head and self._match_at(tokens, i, head)
+                corrected = fuzzy
+                if not hit and i == 0 and not fuzzy:
+                    # perintah prefix salah ketik ("reqeust Judul - Artis") tetap menang atas kata kunci
+                    # di argumennya; typo kata kunci biasa baru dicoba setelah tidak ada yang cocok persis
+                    head = self._correct_word(tok, prefix_only=True)
+                    hit = head and self._match_at(tokens, 0, head)
+                    corrected = True
+                if hit:
+                    msg.intent, msg.fuzzy = hit[0], corrected
+                    if self._intents[hit[0]].prefix:
+                        parts = t.split(None, hit[1])
+                        msg.arg = parts[hit[1]].strip() if len(parts) > hit[1] else ""
+                    return msg
+        return msg
+
+    def dispatch(self, msg: ChatMessage) -> str:
+        if not msg.text:
+            return self._empty(msg)
+        intent = self._intents.get(msg.intent) if msg.intent else None
+        return (intent.handler if intent else self._fallback)(msg)
+
+    def handle(self, text: str) -> str:
+        return self.dispatch(self.route(text))
@@ -12,6 +12,10 @@ PROJECT_ROOT = _APP_PACKAGE_DIR.parent
 INSTANCE_DIR = PROJECT_ROOT / "instance"
 UPLOAD_DIR = PROJECT_ROOT / "uploads"
 DB_PATH = INSTANCE_DIR / "sebayu.db"
+DB_POOL_SIZE       = int(os.environ.get("DB_POOL_SIZE", "8"))
+DB_BUSY_TIMEOUT_MS = int(os.environ.get("DB_BUSY_TIMEOUT_MS", "5000"))
+# Jadwal siaran di-index di memori; tiap N detik cek versi di DB (perubahan dari proses lain)
+SCHEDULE_RECHECK_SECONDS = float(os.environ.get("SCHEDULE_RECHECK_SECONDS", "30"))
 
 ALLOWED_AUDIO = {"wav", "mp3", "m4a", "aac", "flac", "ogg"}
 ALLOWED_IMG = {"png", "jpg", "jpeg", "gif", "webp"}
@@ -19,9 +23,76 @@ ALLOWED_IMG = {"png", "jpg", "jpeg", "gif", "webp"}
 INSTANCE_DIR.mkdir(exist_ok=True)
 UPLOAD_DIR.mkdir(exist_ok=True)
 
+# Cache audio 16 kHz ternormalisasi (key: hash isi file), dibatasi ukuran total
+AUDIO_CACHE_DIR = INSTANCE_DIR / "audio_cache"
+AUDIO_CACHE_MB  = int(os.environ.get("AUDIO_CACHE_MB", "4096"))
+
+# cache  = WAV 16 kHz di AUDIO_CACHE_DIR (cepat untuk transkrip ulang)
+# stream = ffmpeg → PCM float32 via pipe → numpy, tanpa file sementara (hemat disk)
+AUDIO_DECODE = os.environ.get("AUDIO_DECODE", "cache")
+STREAM_WINDOW_SECONDS = int(os.environ.get("STREAM_WINDOW_SECONDS", "600"))
+
+# Mode chunk: potong di jeda (Silero VAD) dengan target durasi *ucapan* per bagian
+VAD_CHUNKING         = os.environ.get("VAD_CHUNKING", "1") not in {"0", "false", "no"}
+CHUNK_TARGET_SECONDS = int(os.environ.get("CHUNK_TARGET_SECONDS", "600"))
+VAD_MIN_SILENCE_MS   = int(os.environ.get("VAD_MIN_SILENCE_MS", "500"))
+
 WHISPER_DEVICE  = os.environ.get("WHISPER_DEVICE", "auto")       # auto|cuda|cpu
 WHISPER_COMPUTE = os.environ.get("WHISPER_COMPUTE", "float16")   # float16|int8_float16|int8
 
+# Transkripsi paralel per bagian (mode chunk). 0 = otomatis dari jumlah core CPU.
+WHISPER_CHUNK_WORKERS = int(os.environ.get("WHISPER_CHUNK_WORKERS", "0"))
+WHISPER_CPU_THREADS   = int(os.environ.get("WHISPER_CPU_THREADS", "0"))  # thread per worker
+WHISPER_POOL          = os.environ.get("WHISPER_POOL", "thread")          # thread|process
+
+# Bersihkan ulang seluruh arsip transkrip (setelah FILLERS/REPLACEMENTS diubah). 0 = jumlah core.
+RECLEAN_WORKERS = int(os.environ.get("RECLEAN_WORKERS", "0"))
+RECLEAN_BATCH   = int(os.environ.get("RECLEAN_BATCH", "32"))   # transkrip per batch baca/tulis DB
+
+# Ringkasan lokal: keyword = skor panjang + kata kunci (di-cache per paragraf),
+# tfidf = kemiripan ke centroid TF-IDF, textrank = PageRank graf kemiripan kalimat.
+SUMMARY_MODES = ("keyword", "tfidf", "textrank")
+SUMMARY_MODE  = os.environ.get("SUMMARY_MODE", "keyword")
+if SUMMARY_MODE not in SUMMARY_MODES:
+    SUMMARY_MODE = "keyword"
+# Cache hasil per paragraf (teks bersih + skor): jumlah entri maksimum, yang paling lama tak dipakai dibuang
+PARAGRAPH_CACHE_MAX_ROWS = int(os.environ.get("PARAGRAPH_CACHE_MAX_ROWS", "50000"))
+
+# Status lagu AzuraCast untuk chatbot: cache di memori, data basi dipakai sambil di-refresh di background
+NOWPLAYING_URL       = os.environ.get("NOWPLAYING_URL", "https://admin.sebayu.my.id/api/nowplaying/sebayu")
+NOWPLAYING_TTL       = float(os.environ.get("NOWPLAYING_TTL", "10"))
+NOWPLAYING_MAX_STALE = float(os.environ.get("NOWPLAYING_MAX_STALE", "120"))
+NOWPLAYING_TIMEOUT   = float(os.environ.get("NOWPLAYING_TIMEOUT", "6"))
+
+# Request lagu dari chat: ditulis ke DB per batch (executemany) di background
+REQUEST_BATCH_SIZE     = int(os.environ.get("REQUEST_BATCH_SIZE", "100"))
+REQUEST_FLUSH_SECONDS  = float(os.environ.get("REQUEST_FLUSH_SECONDS", "1"))
+REQUEST_DEDUPE_SECONDS = float(os.environ.get("REQUEST_DEDUPE_SECONDS", "300"))  # request sama dari user sama
+REQUEST_SPOOL_PATH     = INSTANCE_DIR / "requests_spool.jsonl"
+# Agregat request (leaderboard): umur data per jam yang disimpan + cache hasil leaderboard
+REQUEST_STATS_HOURLY_DAYS   = int(os.environ.get("REQUEST_STATS_HOURLY_DAYS", "14"))
+REQUEST_STATS_CACHE_SECONDS = float(os.environ.get("REQUEST_STATS_CACHE_SECONDS", "15"))
+
+# Antrean transkripsi: jumlah slot paralel + anggaran RAM (MB) untuk model yang resident.
+def _default_mem_budget_mb() -> int:
+    try:
+        total = os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+        return int(total / (1024 * 1024) * 0.6)
+    except (AttributeError, ValueError, OSError):
+        return 8192  # mis. Windows: tidak ada sysconf
+
+TRANSCRIBE_SLOTS  = int(os.environ.get("TRANSCRIBE_SLOTS", "2"))
+TRANSCRIBE_MEM_MB = int(os.environ.get("TRANSCRIBE_MEM_MB", "0")) or _default_mem_budget_mb()
+# Pembatalan dari worker lain: flag di tabel jobs dicek pemilik job paling sering tiap N detik
+JOB_CANCEL_POLL_SECONDS = float(os.environ.get("JOB_CANCEL_POLL_SECONDS", "2"))
+
+# Perkiraan RAM per instance WhisperModel (int8, termasuk buffer decode)
+MODEL_MEM_MB = {"tiny": 400, "base": 600, "small": 1200, "medium": 2600}
+
+# Model resident: batas total (MB, 0 = ikut TRANSCRIBE_MEM_MB) + daftar ukuran yang dimuat saat start
+MODEL_CACHE_MB  = int(os.environ.get("MODEL_CACHE_MB", "0")) or TRANSCRIBE_MEM_MB
+WHISPER_PRELOAD = [m.strip() for m in os.environ.get("WHISPER_PRELOAD", "").split(",") if m.strip()]
+
 logging.basicConfig(
     level=os.environ.get("LOG_LEVEL", "INFO"),
     format="%(asctime)s [%(levelname)s] %(message)s",
@@ -1,13 +1,111 @@
 # my_flask_app/sebayu_app/database.py
+import codecs
+import json
+import os
+import queue
+import socket
 import sqlite3
-from .config import DB_PATH, log
-from datetime import datetime
+import threading
+import time
+from bisect import bisect_right
+from flask import g, has_app_context
+from .config import (
+    DB_PATH, DB_POOL_SIZE, DB_BUSY_TIMEOUT_MS, SCHEDULE_RECHECK_SECONDS,
+    REQUEST_STATS_HOURLY_DAYS, REQUEST_STATS_CACHE_SECONDS, PARAGRAPH_CACHE_MAX_ROWS, log
+)
+from .songs import parse_song_request
+from collections import Counter
+from typing import Iterator
+from datetime import datetime, timedelta
 
-def get_db():
-    conn = sqlite3.connect(DB_PATH)
+# ===== Koneksi =====
+# - Request Flask: pinjam dari pool, dikembalikan di teardown app context (close_db).
+# - Thread background (job transkripsi, SSE): satu koneksi per thread.
+# WAL → pembaca tidak terblokir oleh penulis job; busy_timeout → tidak langsung "database is locked".
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(
+        DB_PATH,
+        timeout=DB_BUSY_TIMEOUT_MS / 1000,
+        check_same_thread=False,   # aman: pool menjamin satu pemakai per koneksi
+        cached_statements=256,     # cache prepared statement per koneksi
+    )
     conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute(f"PRAGMA busy_timeout={int(DB_BUSY_TIMEOUT_MS)}")
     return conn
 
+class ConnectionPool:
+    def __init__(self, size: int):
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue(maxsize=max(1, size))
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            return _connect()
+
+    def release(self, conn: sqlite3.Connection):
+        try:
+            if conn.in_transaction:
+                conn.rollback()  # transaksi yang lupa di-commit tidak boleh bocor ke pemakai berikutnya
+            self._idle.put_nowait(conn)
+        except (queue.Full, sqlite3.Error):
+            conn.close()
+
+_POOL = ConnectionPool(DB_POOL_SIZE)
+_LOCAL = threading.local()
+
+def get_db() -> sqlite3.Connection:
+    """
+    Koneksi untuk konteks saat ini. Tetap dipakai sebagai `with get_db() as db:`
+    (commit/rollback otomatis); koneksi tidak ditutup di akhir blok.
+    """
+    if has_app_context():
+        if "db" not in g:
+            g.db = _POOL.acquire()
+        return g.db
+    conn = getattr(_LOCAL, "conn", None)
+    if conn is None:
+        conn = _LOCAL.conn = _connect()
+    return conn
+
+def close_db(exc=None):
+    conn = g.pop("db", None)
+    if conn is not None:
+        _POOL.release(conn)
+
+def init_app(app):
+    app.teardown_appcontext(close_db)
+
+# Full-text search (FTS5, external content → tidak menduplikasi teks). Dipasang terpisah
+# karena build SQLite tertentu tidak punya FTS5; aplikasi tetap jalan tanpa pencarian.
+FTS_SQL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS transcripts_fts USING fts5(
+  program, transcript, cleaned_transcript, summary,
+  content='transcripts', content_rowid='id',
+  tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS transcripts_fts_ai AFTER INSERT ON transcripts BEGIN
+  INSERT INTO transcripts_fts(rowid, program, transcript, cleaned_transcript, summary)
+  VALUES (new.id, new.program, new.transcript, new.cleaned_transcript, new.summary);
+END;
+CREATE TRIGGER IF NOT EXISTS transcripts_fts_ad AFTER DELETE ON transcripts BEGIN
+  INSERT INTO transcripts_fts(transcripts_fts, rowid, program, transcript, cleaned_transcript, summary)
+  VALUES ('delete', old.id, old.program, old.transcript, old.cleaned_transcript, old.summary);
+END;
+CREATE TRIGGER IF NOT EXISTS transcripts_fts_au
+AFTER UPDATE OF program, transcript, cleaned_transcript, summary ON transcripts BEGIN
+  INSERT INTO transcripts_fts(transcripts_fts, rowid, program, transcript, cleaned_transcript, summary)
+  VALUES ('delete', old.id, old.program, old.transcript, old.cleaned_transcript, old.summary);
+  INSERT INTO transcripts_fts(rowid, program, transcript, cleaned_transcript, summary)
+  VALUES (new.id, new.program, new.transcript, new.cleaned_transcript, new.summary);
+END;
+"""
+
+# Penanda highlight snippet (karakter kontrol, di-escape/diganti <mark> di layer tampilan)
+FTS_MARK_START, FTS_MARK_END = "\x02", "\x03"
+
 SCHEMA_SQL = """
 CREATE TABLE IF NOT EXISTS transcripts (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -20,6 +118,16 @@ CREATE TABLE IF NOT EXISTS transcripts (
   minutes_meta TEXT,
   cleaned_transcript TEXT           -- ← kolom baru untuk teks bersih (boleh null)
 );
+CREATE TABLE IF NOT EXISTS transcript_segments (
+  id INTEGER PRIMARY KEY,
+  transcript_id INTEGER NOT NULL,  -- transcripts.id
+  part INTEGER NOT NULL DEFAULT 0,
+  start_sec REAL NOT NULL,
+  end_sec REAL NOT NULL,
+  avg_logprob REAL,
+  text TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transcript_segments_tid_start ON transcript_segments(transcript_id, start_sec);
 CREATE TABLE IF NOT EXISTS requests (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
   username TEXT NOT NULL,
@@ -28,6 +136,13 @@ CREATE TABLE IF NOT EXISTS requests (
   status TEXT NOT NULL DEFAULT 'baru',
   created_at TEXT NOT NULL
 );
+-- indeks untuk listing keyset (id DESC) + filter
+CREATE INDEX IF NOT EXISTS idx_transcripts_program_id ON transcripts(program, id);
+CREATE INDEX IF NOT EXISTS idx_transcripts_created_at ON transcripts(created_at);
+CREATE INDEX IF NOT EXISTS idx_requests_status_id ON requests(status, id);
+CREATE INDEX IF NOT EXISTS idx_requests_platform_id ON requests(platform, id);
+CREATE INDEX IF NOT EXISTS idx_requests_platform_status_id ON requests(platform, status, id);
+CREATE INDEX IF NOT EXISTS idx_requests_created_at ON requests(created_at);
 CREATE TABLE IF NOT EXISTS schedule (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
   day_of_week INTEGER NOT NULL, -- 0=Senin ... 6=Minggu
@@ -36,6 +151,96 @@ CREATE TABLE IF NOT EXISTS schedule (
   program TEXT NOT NULL,
   host TEXT
 );
+CREATE TABLE IF NOT EXISTS jobs (
+  job_id TEXT PRIMARY KEY,
+  pct INTEGER NOT NULL DEFAULT 0,
+  msg TEXT NOT NULL DEFAULT '',
+  done INTEGER NOT NULL DEFAULT 0,
+  error TEXT,
+  tid INTEGER,
+  queue INTEGER,
+  owner TEXT,                   -- host:pid proses yang menjalankan job
+  seq INTEGER NOT NULL DEFAULT 0, -- naik tiap perubahan; dipakai sebagai id event SSE
+  cancel_requested INTEGER NOT NULL DEFAULT 0, -- diset worker mana pun; dicek oleh pemilik job
+  updated_at TEXT NOT NULL
+);
+"""
+
+# Cache hasil ekstraksi notulen per transkrip. Dihapus otomatis oleh trigger saat teks,
+# ringkasan, HTML editor, atau minutes_meta berubah (termasuk "bersihkan" & simpan meta).
+MINUTES_CACHE_SQL = """
+CREATE TABLE IF NOT EXISTS minutes_cache (
+  transcript_id INTEGER PRIMARY KEY,  -- transcripts.id
+  content_hash TEXT NOT NULL,         -- sha256(teks + ringkasan + kata kunci custom)
+  buckets TEXT NOT NULL,              -- JSON hasil extract_minutes_rule_based
+  created_at TEXT NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS minutes_cache_au AFTER UPDATE OF
+  transcript, cleaned_transcript, transcript_html, summary, minutes_meta ON transcripts BEGIN
+  DELETE FROM minutes_cache WHERE transcript_id = old.id;
+END;
+CREATE TRIGGER IF NOT EXISTS minutes_cache_ad AFTER DELETE ON transcripts BEGIN
+  DELETE FROM minutes_cache WHERE transcript_id = old.id;
+END;
+"""
+
+# Hasil turunan per paragraf (teks bersih + skor kalimat ringkasan), content-addressed:
+# paragraf yang sama tidak dihitung ulang, di transkrip mana pun.
+PARAGRAPH_CACHE_SQL = """
+CREATE TABLE IF NOT EXISTS paragraph_cache (
+  hash TEXT PRIMARY KEY,     -- sha256(versi aturan + teks paragraf)
+  version TEXT NOT NULL,     -- versi aturan cleaner/ringkasan saat dihitung
+  cleaned TEXT NOT NULL,
+  scores TEXT NOT NULL,      -- JSON [skor kalimat] untuk local_summarize_bullets
+  last_used TEXT NOT NULL DEFAULT ''  -- dasar eviksi LRU (lihat PARAGRAPH_CACHE_MAX_ROWS)
+);
+CREATE INDEX IF NOT EXISTS idx_paragraph_cache_version ON paragraph_cache(version);
+"""
+PARAGRAPH_CACHE_INDEX_SQL = """
+CREATE INDEX IF NOT EXISTS idx_paragraph_cache_last_used ON paragraph_cache(last_used);
+"""
+
+# Nomor versi jadwal, dinaikkan trigger pada setiap tulis ke `schedule` (dari proses mana pun);
+# index jadwal di memori dibangun ulang bila versinya berubah.
+SCHEDULE_VERSION_SQL = """
+CREATE TABLE IF NOT EXISTS schedule_version (
+  id INTEGER PRIMARY KEY CHECK (id = 1),
+  version INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO schedule_version(id, version) VALUES (1, 0);
+CREATE TRIGGER IF NOT EXISTS schedule_version_ai AFTER INSERT ON schedule BEGIN
+  UPDATE schedule_version SET version = version + 1 WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS schedule_version_au AFTER UPDATE ON schedule BEGIN
+  UPDATE schedule_version SET version = version + 1 WHERE id = 1;
+END;
+CREATE TRIGGER IF NOT EXISTS schedule_version_ad AFTER DELETE ON schedule BEGIN
+  UPDATE schedule_version SET version = version + 1 WHERE id = 1;
+END;
+"""
+
+# Agregat request lagu per jam & per hari (lagu ternormalisasi × platform), diperbarui di transaksi
+# yang sama dengan INSERT requests → leaderboard tidak perlu GROUP BY atas seluruh tabel requests.
+REQUEST_STATS_SQL = """
+CREATE TABLE IF NOT EXISTS songs (
+  song_key TEXT PRIMARY KEY,   -- "judul|artis" ternormalisasi (songs.parse_song_request)
+  title TEXT NOT NULL,         -- tampilan dari request pertama
+  artist TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS request_counts_hourly (
+  hour TEXT NOT NULL,          -- "YYYY-MM-DD HH"
+  song_key TEXT NOT NULL,
+  platform TEXT NOT NULL,
+  count INTEGER NOT NULL,
+  PRIMARY KEY (hour, song_key, platform)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS request_counts_daily (
+  day TEXT NOT NULL,           -- "YYYY-MM-DD"
+  song_key TEXT NOT NULL,
+  platform TEXT NOT NULL,
+  count INTEGER NOT NULL,
+  PRIMARY KEY (day, song_key, platform)
+) WITHOUT ROWID;
 """
 
 def init_db():
@@ -47,12 +252,29 @@ def init_db():
             "ALTER TABLE transcripts ADD COLUMN transcript_html TEXT",
             "ALTER TABLE transcripts ADD COLUMN minutes_meta TEXT",
             "ALTER TABLE transcripts ADD COLUMN cleaned_transcript TEXT",  # ← penting
+            "ALTER TABLE jobs ADD COLUMN seq INTEGER NOT NULL DEFAULT 0",
+            "ALTER TABLE jobs ADD COLUMN cancel_requested INTEGER NOT NULL DEFAULT 0",
         ]:
             try:
                 db.execute(alter)
             except Exception:
                 pass
 
+        _reap_orphan_jobs(db)
+        _init_fts(db)
+        db.executescript(MINUTES_CACHE_SQL)  # setelah ALTER: trigger merujuk kolom tambahan
+        db.executescript(PARAGRAPH_CACHE_SQL)
+        try:
+            db.execute("ALTER TABLE paragraph_cache ADD COLUMN last_used TEXT NOT NULL DEFAULT ''")
+        except Exception:
+            pass
+        db.executescript(PARAGRAPH_CACHE_INDEX_SQL)  # setelah ALTER: DB lama belum punya last_used
+        db.executescript(SCHEDULE_VERSION_SQL)
+        db.executescript(REQUEST_STATS_SQL)
+        if (db.execute("SELECT 1 FROM songs LIMIT 1").fetchone() is None
+                and db.execute("SELECT 1 FROM requests LIMIT 1").fetchone() is not None):
+            _rebuild_request_stats(db)  # pertama kali: isi agregat dari request lama
+
         # seed jadwal jika kosong
         c = db.execute("SELECT COUNT(*) AS c FROM schedule").fetchone()["c"]
         if c == 0:
@@ -67,35 +289,504 @@ def init_db():
                 seed,
             )
         db.commit()
+    invalidate_schedule_cache()
 
-def now_str() -> str:
-    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+# ===== Cache notulen =====
+def load_minutes_cache(transcript_id: int, content_hash: str) -> dict | None:
+    with get_db() as db:
+        row = db.execute(
+            "SELECT buckets FROM minutes_cache WHERE transcript_id=? AND content_hash=?",
+            (transcript_id, content_hash),
+        ).fetchone()
+    if not row:
+        return None
+    try:
+        return json.loads(row["buckets"])
+    except ValueError:
+        return None
 
-def current_program(dt: datetime = None) -> tuple[str, str] | None:
-    dt = dt or datetime.now()
-    dow = dt.weekday()
-    hhmm = dt.strftime("%H:%M")
+def save_minutes_cache(transcript_id: int, content_hash: str, buckets: dict):
     with get_db() as db:
+        db.execute(
+            "INSERT INTO minutes_cache(transcript_id, content_hash, buckets, created_at) VALUES(?,?,?,?) "
+            "ON CONFLICT(transcript_id) DO UPDATE SET content_hash=excluded.content_hash, "
+            "buckets=excluded.buckets, created_at=excluded.created_at",
+            (transcript_id, content_hash, json.dumps(buckets, ensure_ascii=False), now_str()),
+        )
+        db.commit()
+
+# ===== Cache paragraf =====
+# Per proses: versi aturan yang entri lamanya sudah dibuang + jumlah entri baru sejak cek ukuran terakhir
+_PARAGRAPH_CACHE_STATE = {"version": None, "since_trim": 0}
+PARAGRAPH_CACHE_TOUCH_SECONDS = 3600  # last_used hanya diperbarui bila lebih tua dari ini (hemat tulis)
+
+def load_paragraph_cache(hashes: list[str]) -> dict[str, tuple[str, list]]:
+    """hash → (teks_bersih, [skor kalimat]) untuk hash yang sudah ada di cache."""
+    found = {}
+    stale = (datetime.now() - timedelta(seconds=PARAGRAPH_CACHE_TOUCH_SECONDS)).strftime("%Y-%m-%d %H:%M:%S")
+    touch = []
+    with get_db() as db:
+        for i in range(0, len(hashes), 500):  # batas jumlah parameter SQLite
+            chunk = hashes[i:i + 500]
+            rows = db.execute(
+                f"SELECT hash, cleaned, scores, last_used FROM paragraph_cache WHERE hash IN ({','.join('?' * len(chunk))})",
+                chunk,
+            ).fetchall()
+            for r in rows:
+                found[r["hash"]] = (r["cleaned"], json.loads(r["scores"]))
+                if r["last_used"] < stale:
+                    touch.append(r["hash"])
+        if touch:
+            db.executemany("UPDATE paragraph_cache SET last_used=? WHERE hash=?",
+                           [(now_str(), h) for h in touch])
+            db.commit()
+    return found
+
+def save_paragraph_cache(version: str, entries: list[tuple[str, str, list]]):
+    """
+    entries = [(hash, teks_bersih, [skor kalimat])]. Entri versi aturan lama dibuang sekali per proses
+    (range scan di idx_paragraph_cache_version), dan ukuran tabel dijaga ≤ PARAGRAPH_CACHE_MAX_ROWS
+    dengan membuang entri yang paling lama tidak dipakai.
+    """
+    state = _PARAGRAPH_CACHE_STATE
+    with get_db() as db:
+        if state["version"] != version:
+            db.execute("DELETE FROM paragraph_cache WHERE version < ? OR version > ?", (version, version))
+            state["version"], state["since_trim"] = version, PARAGRAPH_CACHE_MAX_ROWS  # cek ukuran sekarang
+        db.executemany(
+            "INSERT OR REPLACE INTO paragraph_cache(hash, version, cleaned, scores, last_used) VALUES(?,?,?,?,?)",
+            [(h, version, cleaned, json.dumps(scores), now_str()) for h, cleaned, scores in entries],
+        )
+        state["since_trim"] += len(entries)
+        if state["since_trim"] >= max(1, PARAGRAPH_CACHE_MAX_ROWS // 10):  # COUNT(*) tidak tiap simpan
+            state["since_trim"] = 0
+            excess = db.execute("SELECT COUNT(*) FROM paragraph_cache").fetchone()[0] - PARAGRAPH_CACHE_MAX_ROWS
+            if excess > 0:
+                db.execute(
+                    "DELETE FROM paragraph_cache WHERE hash IN "
+                    "(SELECT hash FROM paragraph_cache ORDER BY last_used LIMIT ?)",
+                    (excess,),
+                )
+        db.commit()
+
+# ===== Request lagu =====
+def _add_request_stats(db, rows):
+    """Tambah hitungan agregat untuk rows = [(username, platform, message, status, created_at)]."""
+    hourly, daily, songs = Counter(), Counter(), {}
+    for _, platform, message, _, created_at in rows:
+        song = parse_song_request(message)
+        songs.setdefault(song.key, (song.key, song.title, song.artist))
+        hourly[(created_at[:13], song.key, platform)] += 1
+        daily[(created_at[:10], song.key, platform)] += 1
+    db.executemany("INSERT OR IGNORE INTO songs(song_key, title, artist) VALUES(?,?,?)", list(songs.values()))
+    for table, col, counts in (("request_counts_hourly", "hour", hourly), ("request_counts_daily", "day", daily)):
+        db.executemany(
+            f"INSERT INTO {table}({col}, song_key, platform, count) VALUES(?,?,?,?) "
+            f"ON CONFLICT({col}, song_key, platform) DO UPDATE SET count = count + excluded.count",
+            [(*k, n) for k, n in counts.items()],
+        )
+    cutoff = (datetime.now() - timedelta(days=REQUEST_STATS_HOURLY_DAYS)).strftime("%Y-%m-%d %H")
+    db.execute("DELETE FROM request_counts_hourly WHERE hour < ?", (cutoff,))
+
+def _rebuild_request_stats(db, batch: int = 5000):
+    db.execute("DELETE FROM songs")
+    db.execute("DELETE FROM request_counts_hourly")
+    db.execute("DELETE FROM request_counts_daily")
+    last = 0
+    while True:
         rows = db.execute(
-            "SELECT program, host, start_time, end_time FROM schedule WHERE day_of_week=?",
-            (dow,),
+            "SELECT id, username, platform, message, status, created_at FROM requests WHERE id > ? ORDER BY id LIMIT ?",
+            (last, batch),
         ).fetchall()
-    for r in rows:
-        if r["start_time"] <= hhmm < r["end_time"]:
-            return (r["program"], r["host"] or "")
-    return None
+        if not rows:
+            break
+        _add_request_stats(db, [tuple(r)[1:] for r in rows])
+        last = rows[-1]["id"]
 
-def get_today_schedule_text() -> str:
-    dow = datetime.now().weekday()
-    hari = ["Senin","Selasa","Rabu","Kamis","Jumat","Sabtu","Minggu"][dow]
+def rebuild_request_stats():
+    """Hitung ulang seluruh agregat dari tabel requests (mis. setelah aturan normalisasi lagu berubah)."""
+    with get_db() as db:
+        _rebuild_request_stats(db)
+        db.commit()
+    _LEADERBOARD_CACHE.clear()
+
+def insert_requests(rows: list[tuple]):
+    """rows = [(username, platform, message, status, created_at)] + agregatnya, dalam satu transaksi."""
+    with get_db() as db:
+        db.executemany(
+            "INSERT INTO requests(username, platform, message, status, created_at) VALUES(?,?,?,?,?)",
+            rows,
+        )
+        _add_request_stats(db, rows)
+        db.commit()
+    _LEADERBOARD_CACHE.clear()
+
+# jendela → (tabel, kolom, selisih waktu, format bucket); bucket berjalan ikut dihitung, jadi
+# "hour" = jam ini saja, "day" = 24 bucket jam terakhir, dst.
+LEADERBOARD_WINDOWS = {
+    "hour": ("request_counts_hourly", "hour", timedelta(0), "%Y-%m-%d %H"),
+    "day": ("request_counts_hourly", "hour", timedelta(hours=23), "%Y-%m-%d %H"),
+    "week": ("request_counts_daily", "day", timedelta(days=6), "%Y-%m-%d"),
+    "month": ("request_counts_daily", "day", timedelta(days=29), "%Y-%m-%d"),
+}
+_LEADERBOARD_CACHE: dict = {}
+
+def request_leaderboard(window: str = "day", *, platform: str | None = None, limit: int = 10) -> dict:
+    """
+    Lagu paling banyak diminta + volume per platform dalam `window` (hour|day|week|month).
+    Dibaca dari tabel agregat (biaya ∝ jumlah bucket × lagu di jendela, bukan ukuran tabel requests),
+    lalu di-cache di memori sampai ada insert baru atau REQUEST_STATS_CACHE_SECONDS lewat.
+    """
+    table, col, span, fmt = LEADERBOARD_WINDOWS.get(window) or LEADERBOARD_WINDOWS["day"]
+    key = (window, platform, limit)
+    hit = _LEADERBOARD_CACHE.get(key)
+    now = time.monotonic()
+    if hit is not None and now - hit[0] < REQUEST_STATS_CACHE_SECONDS:
+        return hit[1]
+    since = (datetime.now() - span).strftime(fmt)
+    where, params = f"c.{col} >= ?", [since]
+    if platform:
+        where += " AND c.platform = ?"
+        params.append(platform)
+    with get_db() as db:
+        songs = db.execute(
+            f"SELECT s.title, s.artist, SUM(c.count) AS count FROM {table} c JOIN songs s USING(song_key) "
+            f"WHERE {where} GROUP BY c.song_key ORDER BY count DESC, MIN(c.{col}) LIMIT ?",
+            (*params, limit),
+        ).fetchall()
+        platforms = db.execute(
+            f"SELECT c.platform, SUM(c.count) AS count FROM {table} c WHERE c.{col} >= ? "
+            f"GROUP BY c.platform ORDER BY count DESC",
+            (since,),
+        ).fetchall()
+    result = {
+        "window": window if window in LEADERBOARD_WINDOWS else "day",
+        "since": since,
+        "songs": [dict(r) for r in songs],
+        "platforms": [dict(r) for r in platforms],
+    }
+    if len(_LEADERBOARD_CACHE) > 256:  # kunci ikut filter platform dari query string
+        _LEADERBOARD_CACHE.clear()
+    _LEADERBOARD_CACHE[key] = (now, result)
+    return result
+
+# ===== Listing ber-halaman (keyset pada id) =====
+def _valid_date(v: str | None) -> str | None:
+    try:
+        return datetime.strptime(v, "%Y-%m-%d").strftime("%Y-%m-%d") if v else None
+    except ValueError:
+        return None
+
+def _date_id_bounds(db, table: str, date_from: str | None, date_to: str | None) -> tuple[int, int] | None:
+    """
+    (min id, max id) baris di rentang tanggal, dari idx_<table>_created_at saja (index itu sudah
+    memuat rowid, jadi tanpa baca tabel). Hanya penyempit: id TIDAK diasumsikan naik seiring
+    created_at (request dari buffer/spool bisa tercatat lebih lambat), jadi predikat tanggal
+    tetap dipakai di query halaman. None bila rentangnya kosong.
+    """
+    where, args = [], []
+    if date_from:
+        where.append("created_at >= ?"); args.append(date_from)
+    if date_to:
+        where.append("created_at < date(?, '+1 day')"); args.append(date_to)
+    row = db.execute(f"SELECT min(id), max(id) FROM {table} WHERE " + " AND ".join(where), args).fetchone()
+    return (row[0], row[1]) if row[0] is not None else None
+
+def _keyset_page(table: str, columns: str, filters: dict, before: int | None, limit: int,
+                 date_from: str | None = None, date_to: str | None = None) -> tuple[list, int | None]:
+    """
+    `WHERE <filter> AND id < :before ORDER BY id DESC LIMIT n+1` — biaya konstan per halaman
+    (tanpa OFFSET). Return (rows, cursor_halaman_berikutnya | None).
+    Filter tanggal: rentang id dari _date_id_bounds + predikat `+created_at` (tanda `+` mencegah
+    planner memilih index created_at lalu mengurutkan ulang dengan temp B-tree).
+    """
+    where, args = [], []
+    for col, val in filters.items():
+        if val:
+            where.append(f"{col}=?"); args.append(val)
+    if before:
+        where.append("id < ?"); args.append(int(before))
+    date_from, date_to = _valid_date(date_from), _valid_date(date_to)
+    with get_db() as db:
+        if date_from or date_to:
+            bounds = _date_id_bounds(db, table, date_from, date_to)
+            if bounds is None:
+                return [], None
+            where.append("id BETWEEN ? AND ?"); args.extend(bounds)
+        if date_from:
+            where.append("+created_at >= ?"); args.append(date_from)
+        if date_to:
+            where.append("+created_at < date(?, '+1 day')"); args.append(date_to)
+        sql = f"SELECT {columns} FROM {table}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY id DESC LIMIT ?"
+        args.append(limit + 1)
+        rows = db.execute(sql, args).fetchall()
+    if len(rows) > limit:
+        rows = rows[:limit]
+        return rows, rows[-1]["id"]
+    return rows, None
+
+def list_transcripts(*, program: str | None = None, date_from: str | None = None, date_to: str | None = None,
+                     before: int | None = None, limit: int = 50) -> tuple[list, int | None]:
+    return _keyset_page(
+        "transcripts", "id, program, filename, created_at", {"program": program},
+        before, limit, date_from, date_to,
+    )
+
+def request_statuses() -> list[str]:
+    """Status yang benar-benar ada di tabel requests (loose index scan di idx_requests_status_id)."""
     with get_db() as db:
         rows = db.execute(
-            "SELECT start_time, end_time, program, COALESCE(host,'') host FROM schedule WHERE day_of_week=? ORDER BY start_time",
-            (dow,),
+            "WITH RECURSIVE s(v) AS ("
+            " SELECT min(status) FROM requests"
+            " UNION ALL SELECT (SELECT min(status) FROM requests WHERE status > s.v) FROM s WHERE s.v IS NOT NULL"
+            ") SELECT v FROM s WHERE v IS NOT NULL"
         ).fetchall()
+    return [r[0] for r in rows]
+
+def list_requests(*, status: str | None = None, platform: str | None = None, date_from: str | None = None,
+                  date_to: str | None = None, before: int | None = None, limit: int = 50) -> tuple[list, int | None]:
+    return _keyset_page(
+        "requests", "id, username, platform, message, status, created_at",
+        {"platform": platform, "status": status}, before, limit, date_from, date_to,
+    )
+
+# ===== Pencarian transkrip (FTS5) =====
+def _init_fts(db):
+    try:
+        fresh = db.execute(
+            "SELECT 1 FROM sqlite_master WHERE type='table' AND name='transcripts_fts'"
+        ).fetchone() is None
+        db.executescript(FTS_SQL)
+        if fresh:
+            db.execute("INSERT INTO transcripts_fts(transcripts_fts) VALUES('rebuild')")  # isi dari data lama
+    except sqlite3.OperationalError as e:
+        log.warning(f"FTS5 tidak tersedia, pencarian transkrip dinonaktifkan: {e}")
+
+def _fts_query(q: str) -> str:
+    """Ubah input bebas jadi query FTS5 aman: tiap kata jadi frasa + prefix, digabung AND."""
+    terms = [t.replace('"', '""') for t in q.split() if t.strip('"')]
+    return " ".join(f'"{t}"*' for t in terms)
+
+def search_transcripts(q: str, limit: int = 20, offset: int = 0) -> list:
+    """Hasil terurut bm25 (program & ringkasan diberi bobot lebih) + snippet ber-highlight."""
+    match = _fts_query(q or "")
+    if not match:
+        return []
+    with get_db() as db:
+        return db.execute(
+            "SELECT t.id, t.program, t.filename, t.created_at, "
+            "snippet(transcripts_fts, -1, ?, ?, '…', 16) AS snippet, "
+            "bm25(transcripts_fts, 4.0, 1.0, 1.0, 2.0) AS score "
+            "FROM transcripts_fts JOIN transcripts t ON t.id = transcripts_fts.rowid "
+            "WHERE transcripts_fts MATCH ? "
+            "ORDER BY score LIMIT ? OFFSET ?",
+            (FTS_MARK_START, FTS_MARK_END, match, limit, offset),
+        ).fetchall()
+
+def iter_transcript_column(tid: int, column: str = "transcript", chunk_bytes: int = 1 << 16) -> Iterator[str]:
+    """
+    Baca satu kolom teks transkrip bertahap lewat incremental blob I/O (tanpa memuat seluruh nilai):
+    memori ≈ `chunk_bytes`. Koneksi read-only sendiri, jadi aman dipakai di proses worker.
+    NULL / baris tidak ada → tidak menghasilkan apa pun.
+    """
+    conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True, timeout=DB_BUSY_TIMEOUT_MS / 1000)
+    try:
+        try:
+            blob = conn.blobopen("transcripts", column, tid, readonly=True)
+        except sqlite3.OperationalError:
+            return  # nilai NULL (bukan teks/blob) atau id tidak ada
+        decoder = codecs.getincrementaldecoder("utf-8")("replace")
+        with blob:
+            while chunk := blob.read(chunk_bytes):
+                yield decoder.decode(chunk)
+        yield decoder.decode(b"", final=True)
+    finally:
+        conn.close()
+
+# ===== Segmen bertimestamp =====
+def save_transcript_segments(db, transcript_id: int, segments) -> int:
+    """Tulis segmen (objek dengan start/end/avg_logprob/text/part) sekaligus via executemany."""
+    rows = [
+        (transcript_id, int(getattr(s, "part", 0) or 0), float(s.start), float(s.end),
+         getattr(s, "avg_logprob", None), s.text)
+        for s in sorted(segments, key=lambda s: s.start)
+    ]
+    if rows:
+        db.executemany(
+            "INSERT INTO transcript_segments(transcript_id, part, start_sec, end_sec, avg_logprob, text) "
+            "VALUES(?,?,?,?,?,?)",
+            rows,
+        )
+    return len(rows)
+
+def get_transcript_segments(transcript_id: int, start: float | None = None, end: float | None = None) -> list:
+    """Segmen yang beririsan dengan rentang [start, end) detik (semua bila tanpa rentang)."""
+    sql = ("SELECT part, start_sec, end_sec, avg_logprob, text FROM transcript_segments "
+           "WHERE transcript_id=?")
+    args: list = [transcript_id]
+    if end is not None:
+        sql += " AND start_sec < ?"; args.append(end)
+    if start is not None:
+        sql += " AND end_sec > ?"; args.append(start)
+    sql += " ORDER BY start_sec"
+    with get_db() as db:
+        return db.execute(sql, args).fetchall()
+
+# ===== Job state (progres transkripsi) =====
+# Disimpan di SQLite agar bisa dibaca worker mana pun & bertahan saat restart.
+_JOB_OWNER = f"{socket.gethostname()}:{os.getpid()}"
+
+def save_job_state(job_id: str, state: dict):
+    """Upsert satu baris; dipanggil di setiap update progres jadi harus murah."""
+    with get_db() as db:
+        db.execute(
+            "INSERT INTO jobs(job_id, pct, msg, done, error, tid, queue, owner, seq, updated_at) "
+            "VALUES(?,?,?,?,?,?,?,?,?,?) "
+            "ON CONFLICT(job_id) DO UPDATE SET pct=excluded.pct, msg=excluded.msg, done=excluded.done, "
+            "error=excluded.error, tid=excluded.tid, queue=excluded.queue, owner=excluded.owner, "
+            "seq=excluded.seq, updated_at=excluded.updated_at "
+            "WHERE excluded.seq >= jobs.seq",  # update dari thread paralel bisa tiba tidak berurutan
+            (job_id, int(state.get("pct") or 0), state.get("msg") or "", 1 if state.get("done") else 0,
+             state.get("error"), state.get("tid"), state.get("queue"), _JOB_OWNER,
+             int(state.get("seq") or 0), now_str()),
+        )
+        db.commit()
+
+def load_job_state(job_id: str) -> dict | None:
+    with get_db() as db:
+        row = db.execute(
+            "SELECT pct, msg, done, error, tid, queue, seq FROM jobs WHERE job_id=?", (job_id,)
+        ).fetchone()
+    if not row:
+        return None
+    return {"pct": row["pct"], "msg": row["msg"], "done": bool(row["done"]),
+            "error": row["error"], "tid": row["tid"], "queue": row["queue"], "seq": row["seq"]}
+
+def request_job_cancel(job_id: str) -> bool:
+    """Minta batal job yang belum selesai, dari proses mana pun. False bila tidak ada / sudah selesai."""
+    with get_db() as db:
+        cur = db.execute("UPDATE jobs SET cancel_requested=1 WHERE job_id=? AND done=0", (job_id,))
+        db.commit()
+        return cur.rowcount > 0
+
+def job_cancel_requested(job_id: str) -> bool:
+    with get_db() as db:
+        row = db.execute("SELECT cancel_requested FROM jobs WHERE job_id=?", (job_id,)).fetchone()
+    return bool(row and row["cancel_requested"])
+
+def pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except (PermissionError, OSError):
+        return True
+    return True
+
+def _reap_orphan_jobs(db):
+    """Tandai gagal job di host ini yang prosesnya sudah mati (mis. server restart)."""
+    host = socket.gethostname()
+    rows = db.execute("SELECT job_id, owner FROM jobs WHERE done=0").fetchall()
+    for r in rows:
+        owner_host, _, pid = (r["owner"] or "").rpartition(":")
+        if owner_host != host or not pid.isdigit() or pid_alive(int(pid)):
+            continue
+        db.execute(
+            "UPDATE jobs SET done=1, pct=100, queue=NULL, msg='Gagal: server dimulai ulang', "
+            "error='Proses berhenti sebelum job selesai', seq=seq+1, updated_at=? WHERE job_id=?",
+            (now_str(), r["job_id"]),
+        )
+    # buang riwayat job lama
+    db.execute("DELETE FROM jobs WHERE done=1 AND updated_at < datetime('now','localtime','-7 days')")
+
+def now_str() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+# ===== Jadwal siaran (index di memori) =====
+HARI = ["Senin", "Selasa", "Rabu", "Kamis", "Jumat", "Sabtu", "Minggu"]
+
+def _schedule_day_index(rows: list) -> tuple[list, list]:
+    """
+    Interval satu hari → segmen terpisah: bounds[k] ≤ hhmm < bounds[k+1] punya program owners[k].
+    Bila interval tumpang tindih, pemenangnya baris dengan id terkecil (sama dengan scan lama).
+    Lookup = satu bisect.
+    """
+    bounds = sorted({r["start_time"] for r in rows} | {r["end_time"] for r in rows})
+    owners = []
+    for lo in bounds:
+        hit = next((r for r in rows if r["start_time"] <= lo < r["end_time"]), None)
+        owners.append((hit["program"], hit["host"] or "") if hit else None)
+    return bounds, owners
+
+def _schedule_day_text(dow: int, rows: list) -> str:
+    hari = HARI[dow]
     if not rows: return f"{hari}: belum ada jadwal."
     lines = [f"Jadwal {hari}:"]
-    for r in rows:
+    for r in sorted(rows, key=lambda r: r["start_time"]):
         host = f" (host: {r['host']})" if r["host"] else ""
         lines.append(f"{r['start_time']}-{r['end_time']}: {r['program']}{host}")
     return "\n".join(lines)
+
+class _ScheduleIndex:
+    """
+    Jadwal mingguan di memori: per hari (bounds, owners) untuk bisect + teks jadwal yang sudah jadi.
+    Dibangun ulang saat invalidate() (tulis dari proses ini) atau bila schedule_version di DB berubah
+    (dicek paling sering tiap SCHEDULE_RECHECK_SECONDS, untuk tulis dari proses lain).
+    """
+
+    def __init__(self, recheck_seconds: float):
+        self.recheck_seconds = recheck_seconds
+        self._lock = threading.Lock()
+        self._data = None        # (version, days, texts)
+        self._checked_at = 0.0
+
+    def invalidate(self):
+        with self._lock:
+            self._data = None
+
+    def _current(self):
+        data = self._data
+        if data is not None and time.monotonic() - self._checked_at < self.recheck_seconds:
+            return data
+        with self._lock:
+            if self._data is not None and time.monotonic() - self._checked_at < self.recheck_seconds:
+                return self._data
+            with get_db() as db:
+                row = db.execute("SELECT version FROM schedule_version WHERE id = 1").fetchone()
+                version = row["version"] if row else None
+                if self._data is None or self._data[0] != version:
+                    rows = db.execute(
+                        "SELECT id, day_of_week, start_time, end_time, program, host FROM schedule ORDER BY id"
+                    ).fetchall()
+                    by_day = [[r for r in rows if r["day_of_week"] == d] for d in range(7)]
+                    self._data = (
+                        version,
+                        [_schedule_day_index(day) for day in by_day],
+                        [_schedule_day_text(d, day) for d, day in enumerate(by_day)],
+                    )
+            self._checked_at = time.monotonic()
+            return self._data
+
+    def program_at(self, dow: int, hhmm: str) -> tuple[str, str] | None:
+        bounds, owners = self._current()[1][dow]
+        k = bisect_right(bounds, hhmm) - 1
+        return owners[k] if k >= 0 else None
+
+    def day_text(self, dow: int) -> str:
+        return self._current()[2][dow]
+
+_SCHEDULE = _ScheduleIndex(SCHEDULE_RECHECK_SECONDS)
+
+def invalidate_schedule_cache():
+    """Panggil setelah menulis tabel `schedule` agar perubahan langsung terlihat di proses ini."""
+    _SCHEDULE.invalidate()
+
+def current_program(dt: datetime = None) -> tuple[str, str] | None:
+    dt = dt or datetime.now()
+    return _SCHEDULE.program_at(dt.weekday(), dt.strftime("%H:%M"))
+
+def get_today_schedule_text() -> str:
+    return _SCHEDULE.day_text(datetime.now().weekday())
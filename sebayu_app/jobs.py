@@ -0,0 +1,241 @@
+# my_flask_app/sebayu_app/jobs.py
+import bisect
+import heapq
+import itertools
+import threading
+from dataclasses import dataclass, field
+from typing import Callable, Optional
+
+from .config import log
+
+PRIORITY_HIGH = 0
+PRIORITY_NORMAL = 1
+PRIORITY_LOW = 2
+
+class JobCancelled(Exception):
+    """Dilempar dari callback progres saat job diminta batal."""
+
+@dataclass
+class Job:
+    job_id: str
+    fn: Callable
+    args: tuple
+    priority: int = PRIORITY_NORMAL
+    mem_mb: int = 0
+    seq: int = 0
+    cancel: threading.Event = field(default_factory=threading.Event)
+
+class JobScheduler:
+    """
+    Antrean job berat (transkripsi) dengan slot tetap + anggaran memori.
+    - `slots` thread worker tetap; tidak ada thread baru per unggahan.
+    - Urutan: prioritas lalu FIFO. Hanya kepala antrean yang boleh jalan
+      (tidak ada lompat antrean), dan ia menunggu sampai memori cukup.
+    - Job yang lebih besar dari seluruh anggaran tetap jalan bila tidak ada job lain.
+    """
+
+    def __init__(self, slots: int, mem_budget_mb: int,
+                 on_queue: Optional[Callable[[str, int], None]] = None,
+                 on_cancel: Optional[Callable[[str], None]] = None):
+        self.slots = max(1, int(slots))
+        self.mem_budget_mb = max(0, int(mem_budget_mb))
+        self._on_queue = on_queue
+        self._on_cancel = on_cancel
+        self._cv = threading.Condition()
+        self._heap: list[tuple[int, int, Job]] = []
+        self._seq = itertools.count()
+        self._running: dict[str, Job] = {}
+        self._mem_used = 0
+        self._workers: list[threading.Thread] = []
+        # posisi antrean dipublikasikan (on_queue → tulis DB) di luar self._cv; generasi mencegah
+        # snapshot lama menimpa yang lebih baru bila dua thread mempublikasikan bersamaan
+        self._pos_gen = 0
+        self._published_gen = 0
+        self._publish_lock = threading.Lock()
+
+    # --- API publik ---
+    def submit(self, job_id: str, fn: Callable, args: tuple = (), *,
+               priority: int = PRIORITY_NORMAL, mem_mb: int = 0,
+               cancel: Optional[threading.Event] = None) -> Job:
+        """`cancel` boleh diteruskan juga ke `fn` agar job bisa berhenti kooperatif."""
+        job = Job(job_id, fn, tuple(args), int(priority), int(mem_mb), next(self._seq),
+                  cancel or threading.Event())
+        with self._cv:
+            self._ensure_workers()
+            heapq.heappush(self._heap, (job.priority, job.seq, job))
+            positions = self._positions_locked()
+            self._cv.notify_all()
+        self._publish_positions(positions)
+        log.info(f"[{job_id}] masuk antrean (prioritas {job.priority}, ~{job.mem_mb} MB)")
+        return job
+
+    def cancel(self, job_id: str) -> bool:
+        """Batalkan job. Yang masih antre langsung dibuang; yang berjalan diberi sinyal."""
+        with self._cv:
+            for i, (_, _, job) in enumerate(self._heap):
+                if job.job_id == job_id:
+                    self._heap.pop(i)
+                    heapq.heapify(self._heap)
+                    positions = self._positions_locked()
+                    self._cv.notify_all()
+                    break
+            else:
+                job = self._running.get(job_id)
+                if not job:
+                    return False
+                job.cancel.set()
+                return True
+        self._publish_positions(positions)
+        if self._on_cancel:
+            self._on_cancel(job_id)
+        return True
+
+    def position(self, job_id: str) -> int:
+        """Posisi di antrean (1 = berikutnya), 0 bila sedang/selesai berjalan."""
+        with self._cv:
+            for pos, (_, _, job) in enumerate(sorted(self._heap), 1):
+                if job.job_id == job_id:
+                    return pos
+        return 0
+
+    def stats(self) -> dict:
+        with self._cv:
+            return {
+                "slots": self.slots,
+                "running": len(self._running),
+                "queued": len(self._heap),
+                "mem_used_mb": self._mem_used,
+                "mem_budget_mb": self.mem_budget_mb,
+            }
+
+    # --- Internal ---
+    def _ensure_workers(self):
+        while len(self._workers) < self.slots:
+            t = threading.Thread(target=self._worker_loop, name=f"job-slot-{len(self._workers)+1}", daemon=True)
+            self._workers.append(t)
+            t.start()
+
+    def _fits(self, job: Job) -> bool:
+        if not self._running:
+            return True
+        if len(self._running) >= self.slots:
+            return False
+        return self.mem_budget_mb <= 0 or self._mem_used + job.mem_mb <= self.mem_budget_mb
+
+    def _positions_locked(self) -> tuple[int, list[tuple[str, int]]]:
+        """Snapshot posisi antrean (dipanggil dengan self._cv dipegang)."""
+        self._pos_gen += 1
+        return self._pos_gen, [(job.job_id, pos) for pos, (_, _, job) in enumerate(sorted(self._heap), 1)]
+
+    def _publish_positions(self, positions: tuple[int, list[tuple[str, int]]]):
+        """Kirim snapshot ke on_queue TANPA memegang self._cv (on_queue menulis DB)."""
+        if not self._on_queue:
+            return
+        gen, items = positions
+        with self._publish_lock:
+            if gen < self._published_gen:
+                return  # sudah ada snapshot yang lebih baru
+            self._published_gen = gen
+            for job_id, pos in items:
+                try:
+                    self._on_queue(job_id, pos)
+                except Exception as e:
+                    log.warning(f"[{job_id}] gagal update posisi antrean: {e}")
+
+    def _worker_loop(self):
+        while True:
+            with self._cv:
+                while not self._heap or not self._fits(self._heap[0][2]):
+                    self._cv.wait()
+                _, _, job = heapq.heappop(self._heap)
+                self._running[job.job_id] = job
+                self._mem_used += job.mem_mb
+                positions = self._positions_locked()
+            self._publish_positions(positions)
+            try:
+                job.fn(*job.args)
+            except Exception:
+                log.exception(f"[{job.job_id}] job error")
+            finally:
+                with self._cv:
+                    self._running.pop(job.job_id, None)
+                    self._mem_used -= job.mem_mb
+                    self._cv.notify_all()
+
+class ProgressHub:
+    """
+    Pub/sub progres per job untuk SSE.
+    - `publish` hanya menaikkan `seq` & membangunkan pelanggan bila state benar-benar berubah.
+    - `publish_segment` menambah potongan transkrip live ke buffer job (seq yang sama,
+      jadi id event SSE tetap monoton untuk Last-Event-ID).
+    - Setiap job punya Condition sendiri (berbagi satu lock), jadi update job A
+      tidak membangunkan penonton job B.
+    """
+
+    def __init__(self, store: dict):
+        self._lock = threading.Lock()
+        self._conds: dict[str, threading.Condition] = {}
+        self._waiters: dict[str, int] = {}
+        self._seq: dict[str, int] = {}
+        self._seg_seqs: dict[str, list[int]] = {}
+        self._segments: dict[str, list[dict]] = {}
+        self._store = store
+
+    def _bump_locked(self, job_id: str) -> int:
+        seq = self._seq[job_id] = self._seq.get(job_id, (self._store.get(job_id) or {}).get("seq", 0)) + 1
+        cond = self._conds.get(job_id)
+        if cond:
+            cond.notify_all()
+        return seq
+
+    def publish(self, job_id: str, state: dict) -> Optional[dict]:
+        """Simpan state ke store lokal; kembalikan state baru (dengan `seq`) atau None bila tidak berubah."""
+        with self._lock:
+            prev = self._store.get(job_id)
+            if prev and all(prev.get(k) == v for k, v in state.items()):
+                return None
+            new_state = dict(state)
+            self._store[job_id] = new_state
+            new_state["seq"] = self._bump_locked(job_id)
+            return new_state
+
+    def publish_segment(self, job_id: str, segment: dict) -> int:
+        with self._lock:
+            seq = self._bump_locked(job_id)
+            self._seg_seqs.setdefault(job_id, []).append(seq)
+            self._segments.setdefault(job_id, []).append(segment)
+            return seq
+
+    def segments_since(self, job_id: str, after_seq: int) -> list[tuple[int, dict]]:
+        with self._lock:
+            seqs = self._seg_seqs.get(job_id) or []
+            start = bisect.bisect_right(seqs, after_seq)
+            return list(zip(seqs[start:], self._segments[job_id][start:])) if start < len(seqs) else []
+
+    def forget(self, job_id: str):
+        """Buang semua state lokal job yang sudah selesai (buffer segmen, seq, state di store).
+        Setelah ini `get_progress` membaca state akhirnya dari DB."""
+        with self._lock:
+            self._seg_seqs.pop(job_id, None)
+            self._segments.pop(job_id, None)
+            self._seq.pop(job_id, None)
+            self._store.pop(job_id, None)
+
+    def is_local(self, job_id: str) -> bool:
+        with self._lock:
+            return job_id in self._store
+
+    def wait(self, job_id: str, after_seq: int, timeout: float) -> bool:
+        """Tunggu sampai `seq` job > after_seq. True bila ada perubahan sebelum timeout."""
+        with self._lock:
+            cond = self._conds.get(job_id)
+            if cond is None:
+                cond = self._conds[job_id] = threading.Condition(self._lock)
+            self._waiters[job_id] = self._waiters.get(job_id, 0) + 1
+            try:
+                return cond.wait_for(lambda: self._seq.get(job_id, 0) > after_seq, timeout)
+            finally:
+                self._waiters[job_id] -= 1
+                if not self._waiters[job_id]:
+                    del self._waiters[job_id]
+                    del self._conds[job_id]
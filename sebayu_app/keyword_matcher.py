@@ -0,0 +1,110 @@
+# my_flask_app/sebayu_app/keyword_matcher.py
+import re
+from typing import Dict, Iterable, List, Tuple
+
+_WORD = re.compile(r"\w+")
+_WORD_CHAR = re.compile(r"\w")
+# alternatif yang cukup dicocokkan sebagai kata/frasa literal: \bkata frasa\b
+_LITERAL_ALT = re.compile(r"\\b(\w(?:[\w \-]*\w)?)\\b")
+_LITERAL_WORD = re.compile(r"\w(?:[\w \-]*\w)?")
+# grup kata: \b(kata1|kata2|...)\b  (bentuk RE_DECISION_VERB / RE_ACTION_VERB)
+_GROUP_ALT = re.compile(r"\\b\(([^()\\]*)\)\\b")
+
+def _split_alternatives(pattern: str) -> List[str]:
+    """Pecah `a|b|(c|d)` di level teratas saja → ['a', 'b', '(c|d)']."""
+    parts, depth, start, i = [], 0, 0, 0
+    in_class = False
+    while i < len(pattern):
+        ch = pattern[i]
+        if ch == "\\":
+            i += 2
+            continue
+        if in_class:
+            in_class = ch != "]"
+        elif ch == "[":
+            in_class = True
+        elif ch == "(":
+            depth += 1
+        elif ch == ")":
+            depth -= 1
+        elif ch == "|" and depth == 0:
+            parts.append(pattern[start:i])
+            start = i + 1
+        i += 1
+    parts.append(pattern[start:])
+    return parts
+
+class KeywordMatcher:
+    """
+    Skor kategori untuk satu baris dalam satu kali scan.
+    `rules` = [(label, bobot, regex)]; tiap rule menyumbang bobotnya sekali bila regex-nya cocok
+    (sama seperti `if rgx.search(line): score[label] += bobot`).
+    - Alternatif berbentuk `\\bkata/frasa\\b` masuk indeks literal per kata pertama: baris dipecah
+      jadi kata sekali, tiap kata jadi lookup dict (gaya Aho-Corasick per kata).
+    - Alternatif lain (mis. `follow[- ]?up`, `\\bH\\+?\\d+\\b`) tetap regex, disaring dulu dengan satu
+      regex gabungan; regex per rule hanya dijalankan bila saringan kena.
+    Pencocokan literal case-insensitive via lower(), setara re.I untuk teks Indonesia/ASCII.
+    """
+
+    def __init__(self, rules: Iterable[Tuple[str, float, str]], flags: int = re.I):
+        self.labels: List[str] = []
+        self._rules: List[Tuple[str, float]] = []
+        self._by_first: Dict[str, List[Tuple[str, int]]] = {}
+        self._fallback: List[Tuple[int, re.Pattern]] = []
+        for rid, (label, weight, pattern) in enumerate(rules):
+            if label not in self.labels:
+                self.labels.append(label)
+            self._rules.append((label, float(weight)))
+            literals, rest = [], []
+            for alt in _split_alternatives(pattern):
+                m = _LITERAL_ALT.fullmatch(alt)
+                g = _GROUP_ALT.fullmatch(alt)
+                if m:
+                    literals.append(m.group(1))
+                elif g:
+                    for word in _split_alternatives(g.group(1)):
+                        if _LITERAL_WORD.fullmatch(word):
+                            literals.append(word)
+                        else:
+                            rest.append(rf"\b(?:{word})\b")
+                else:
+                    rest.append(alt)
+            for lit in literals:
+                lit = lit.lower()
+                self._by_first.setdefault(_WORD.match(lit).group(), []).append((lit, rid))
+            if rest:
+                self._fallback.append((rid, re.compile("|".join(rest), flags)))
+        # satu regex gabungan sebagai saringan: regex per rule hanya dijalankan bila ada yang kena
+        self._fallback_any = None
+        if self._fallback:
+            try:
+                self._fallback_any = re.compile("|".join(f"(?:{r.pattern})" for _, r in self._fallback), flags)
+            except re.error:
+                pass  # mis. nama grup ganda / backreference di kata kunci custom → tanpa saringan
+
+    def matched_rules(self, text: str) -> set:
+        low = text.lower()
+        hit = set()
+        for m in _WORD.finditer(low):
+            cands = self._by_first.get(m.group())
+            if not cands:
+                continue
+            pos = m.start()
+            for lit, rid in cands:
+                if rid in hit or not low.startswith(lit, pos):
+                    continue
+                end = pos + len(lit)
+                if end == len(low) or not _WORD_CHAR.match(low, end):
+                    hit.add(rid)
+        if self._fallback and (self._fallback_any is None or self._fallback_any.search(text)):
+            for rid, rgx in self._fallback:
+                if rid not in hit and rgx.search(text):
+                    hit.add(rid)
+        return hit
+
+    def scores(self, text: str) -> Dict[str, float]:
+        score = {k: 0.0 for k in self.labels}
+        for rid in sorted(self.matched_rules(text)):  # urutan rule → penjumlahan float sama persis
+            label, weight = self._rules[rid]
+            score[label] += weight
+        return score
@@ -0,0 +1,143 @@
+# my_flask_app/sebayu_app/model_manager.py
+import threading
+from collections import Counter, OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Hashable, Iterable, Optional
+
+from .config import log
+
+class ModelManager:
+    """
+    Cache model Whisper yang resident di memori.
+    - LRU dengan batas total memori (MB); model yang baru dipakai tidak akan dievict.
+    - Single-flight: dua thread yang minta model sama hanya memicu satu kali load.
+    - Model yang sedang dipakai job (lease) tidak pernah dievict: objeknya tetap hidup selama dipakai,
+      jadi membuangnya dari cache tidak membebaskan memori dan hanya memicu load salinan kedua.
+    - Statistik load/hit/miss/evict untuk observasi.
+    `loader(key)` membuat model, `mem_of(key)` memberi perkiraan ukurannya (MB).
+    """
+
+    def __init__(self, loader: Callable[[tuple], object], mem_of: Callable[[tuple], int], mem_budget_mb: int):
+        self._loader = loader
+        self._mem_of = mem_of
+        self.mem_budget_mb = max(0, int(mem_budget_mb))
+        self._lock = threading.Lock()
+        self._models: "OrderedDict[Hashable, object]" = OrderedDict()
+        self._loading: dict[Hashable, threading.Event] = {}
+        self._errors: dict[Hashable, BaseException] = {}
+        self._leases: Counter = Counter()
+        self._mem_used = 0
+        self._stats = {"loads": 0, "hits": 0, "misses": 0, "evictions": 0, "load_errors": 0}
+
+    def get(self, key: tuple):
+        return self._get(key, lease=False)
+
+    @contextmanager
+    def lease(self, key: tuple):
+        """`with manager.lease(key) as model:` — model tidak dievict sampai blok selesai."""
+        model = self._get(key, lease=True)
+        try:
+            yield model
+        finally:
+            self.release(key)
+
+    def release(self, key: tuple):
+        with self._lock:
+            self._leases[key] -= 1
+            if self._leases[key] <= 0:
+                del self._leases[key]
+                self._evict_locked(keep=None)  # anggaran yang sempat terlampaui ditegakkan lagi
+
+    def _get(self, key: tuple, lease: bool):
+        while True:
+            with self._lock:
+                model = self._models.get(key)
+                if model is not None:
+                    self._models.move_to_end(key)
+                    self._stats["hits"] += 1
+                    if lease:
+                        self._leases[key] += 1
+                    return model
+                pending = self._loading.get(key)
+                if pending is None:
+                    pending = self._loading[key] = threading.Event()
+                    self._stats["misses"] += 1
+                    break
+            # thread lain sedang memuat model yang sama → tunggu hasilnya
+            pending.wait()
+            with self._lock:
+                err = self._errors.get(key)
+            if err is not None and key not in self._models:
+                raise err
+
+        try:
+            model = self._loader(key)
+        except BaseException as e:
+            with self._lock:
+                self._stats["load_errors"] += 1
+                self._errors[key] = e
+                self._loading.pop(key).set()
+            raise
+
+        with self._lock:
+            self._errors.pop(key, None)
+            self._models[key] = model
+            self._mem_used += self._mem_of(key)
+            if lease:
+                self._leases[key] += 1
+            self._stats["loads"] += 1
+            self._evict_locked(keep=key)
+            self._loading.pop(key).set()
+        log.info(f"Model dimuat: {key} (resident ~{self._mem_used} MB)")
+        return model
+
+    def preload(self, keys: Iterable[tuple], *, background: bool = True) -> Optional[threading.Thread]:
+        keys = list(keys)
+
+        def run():
+            for key in keys:
+                try:
+                    self.get(key)
+                except Exception as e:
+                    log.warning(f"Preload model {key} gagal: {e}")
+
+        if not keys:
+            return None
+        if not background:
+            run()
+            return None
+        t = threading.Thread(target=run, name="model-preload", daemon=True)
+        t.start()
+        return t
+
+    def evict(self, key: tuple) -> bool:
+        with self._lock:
+            if key not in self._models or self._leases[key] > 0:
+                return False
+            self._drop_locked(key)
+            return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            return dict(
+                self._stats,
+                resident=[list(k) for k in self._models],
+                leased=[list(k) for k in self._leases],
+                mem_used_mb=self._mem_used,
+                mem_budget_mb=self.mem_budget_mb,
+            )
+
+    def _drop_locked(self, key):
+        self._models.pop(key)
+        self._mem_used -= self._mem_of(key)
+        self._stats["evictions"] += 1
+        log.info(f"Model dievict (LRU): {key}")
+
+    def _evict_locked(self, keep):
+        if self.mem_budget_mb <= 0:
+            return
+        for key in list(self._models):
+            if self._mem_used <= self.mem_budget_mb:
+                break
+            if key != keep and self._leases[key] <= 0:
+                self._drop_locked(key)
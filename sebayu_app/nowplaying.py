@@ -0,0 +1,115 @@
+# my_flask_app/sebayu_app/nowplaying.py
+import threading
+import time
+from typing import Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .config import log
+
+class NowPlayingCache:
+    """
+    Cache JSON nowplaying AzuraCast di memori (TTL + stale-while-revalidate).
+    - Umur < ttl: langsung dari memori.
+    - ttl ≤ umur < max_stale: data lama langsung dikembalikan, satu refresh jalan di background.
+    - Belum ada data / terlalu basi: tunggu refresh yang sedang jalan (maks. timeout), tidak menembak API sendiri.
+    - Satu thread refresher (daemon, hidup selama proses) yang dibangunkan saat butuh data baru;
+      memakai satu requests.Session (koneksi keep-alive dipakai ulang).
+    - Gagal refresh: error di-cache selama ttl, jadi API yang mati tidak dibanjiri request.
+    `url` bisa diarahkan ke server stub lokal (NOWPLAYING_URL) untuk uji/benchmark.
+    """
+
+    def __init__(self, url: str, *, ttl: float = 10.0, max_stale: float = 120.0, timeout: float = 6.0,
+                 session: Optional[requests.Session] = None):
+        self.url = url
+        self.ttl = float(ttl)
+        self.max_stale = max(float(max_stale), self.ttl)
+        self.timeout = float(timeout)
+        if session is None:
+            session = requests.Session()
+            session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+            session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=2))
+        self._session = session
+        self._lock = threading.Lock()
+        self._data: Optional[dict] = None
+        self._fetched_at = 0.0
+        self._error: Optional[BaseException] = None
+        self._error_at = 0.0
+        self._refreshing: Optional[threading.Event] = None   # selesai-nya refresh yang diminta
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._stats = {"hits": 0, "stale_hits": 0, "waits": 0, "refreshes": 0, "errors": 0}
+
+    def get(self) -> dict:
+        """JSON nowplaying terbaru yang tersedia; raise bila tidak ada data yang cukup segar."""
+        with self._lock:
+            now = time.monotonic()
+            age = now - self._fetched_at
+            if self._data is not None and age < self.ttl:
+                self._stats["hits"] += 1
+                return self._data
+            usable = self._data is not None and age < self.max_stale
+            backoff = self._error is not None and now - self._error_at < self.ttl
+            if backoff and not usable:
+                raise self._error
+            pending = self._refreshing if backoff else self._start_refresh_locked()
+            if usable:
+                self._stats["stale_hits"] += 1
+                return self._data
+            self._stats["waits"] += 1
+        if pending is not None:
+            pending.wait(self.timeout + 1.0)
+        with self._lock:
+            if self._data is not None and time.monotonic() - self._fetched_at < self.max_stale:
+                return self._data
+            raise self._error or TimeoutError("nowplaying belum tersedia")
+
+    def _start_refresh_locked(self) -> threading.Event:
+        if self._refreshing is None:
+            self._refreshing = threading.Event()
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True, name="nowplaying-refresh")
+                self._thread.start()
+            self._wake.set()
+        return self._refreshing
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            with self._lock:
+                done = self._refreshing
+            if done is not None:
+                self._refresh(done)
+
+    def _refresh(self, done: threading.Event):
+        try:
+            resp = self._session.get(self.url, timeout=self.timeout)
+            resp.raise_for_status()
+            data = resp.json()
+        except Exception as e:
+            log.warning(f"Gagal refresh nowplaying: {e}")
+            with self._lock:
+                self._error, self._error_at = e, time.monotonic()
+                self._stats["errors"] += 1
+        else:
+            with self._lock:
+                self._data, self._fetched_at = data, time.monotonic()
+                self._error = None
+                self._stats["refreshes"] += 1
+        finally:
+            with self._lock:
+                self._refreshing = None
+            done.set()
+
+    def stats(self) -> dict:
+        with self._lock:
+            age = time.monotonic() - self._fetched_at if self._data is not None else None
+            return {
+                **self._stats,
+                "age_s": round(age, 1) if age is not None else None,
+                "ttl_s": self.ttl,
+                "max_stale_s": self.max_stale,
+                "last_error": str(self._error) if self._error else None,
+            }
@@ -3,8 +3,7 @@ from flask import render_template, request, jsonify
 # Impor relatif dari package routes
 from . import chatbot_bp
 # Impor relatif dari package sebayu_app
-from ..database import get_db, now_str
-from ..utils import handle_chat_message
+from ..utils import CHAT_ROUTER, queue_song_request
 
 # --- Web Chatbot UI + API ---
 @chatbot_bp.route("/chat")
@@ -16,17 +15,14 @@ def api_chat():
     data = request.get_json(silent=True) or {}
     text = (data.get("text") or "").strip()
     user = (data.get("username") or "web-user").strip()
-    reply = handle_chat_message(text)
+    msg = CHAT_ROUTER.route(text)
+    reply = CHAT_ROUTER.dispatch(msg)
 
-    lowered = text.lower()
-    if lowered.startswith("request ") or lowered.startswith("req "):
-        payload = text.split(" ", 1)[1] if " " in text else ""
+    if msg.intent == "request":
+        payload = msg.arg
         if payload:
-            with get_db() as db:
-                db.execute(
-                    "INSERT INTO requests(username, platform, message, status, created_at) VALUES(?,?,?,?,?)",
-                    (user, "web", payload, "baru", now_str()),
-                )
-                db.commit() # Commit perubahan
-            reply += "\n\n✅ Request kamu sudah tercatat. Terima kasih!"
+            if queue_song_request(user, "web", payload):
+                reply += "\n\n✅ Request kamu sudah tercatat. Terima kasih!"
+            else:
+                reply += "\n\nℹ️ Request yang sama sudah tercatat barusan, tidak perlu dikirim ulang."
     return jsonify({"reply": reply})
\ No newline at end of file
@@ -1,9 +1,38 @@
-from flask import render_template, send_from_directory
+import sqlite3
+from flask import render_template, send_from_directory, request, jsonify
+from markupsafe import Markup, escape
 # Impor relatif dari package routes
 from . import main_bp
 # Impor relatif dari package sebayu_app
-from ..database import get_db, current_program
-from ..config import UPLOAD_DIR
+from ..database import (
+    get_db, current_program, search_transcripts, list_transcripts, list_requests, request_statuses,
+    request_leaderboard, FTS_MARK_START, FTS_MARK_END, LEADERBOARD_WINDOWS
+)
+from ..config import UPLOAD_DIR, SUMMARY_MODE, log
+
+PAGE_SIZE = 50
+
+def _list_filters(*names: str) -> dict:
+    """Ambil filter listing dari query string (kosong → None), selalu termasuk rentang tanggal."""
+    keys = list(names) + ["date_from", "date_to"]
+    return {k: (request.args.get(k) or "").strip() or None for k in keys}
+
+def _highlight(snippet: str) -> Markup:
+    """Escape teks snippet lalu ubah penanda FTS jadi <mark>."""
+    html = str(escape(snippet or ""))
+    return Markup(html.replace(FTS_MARK_START, "<mark>").replace(FTS_MARK_END, "</mark>"))
+
+def _search(q: str, limit: int = 50) -> list[dict]:
+    try:
+        rows = search_transcripts(q, limit=limit)
+    except sqlite3.OperationalError as e:
+        log.warning(f"Pencarian gagal: {e}")
+        return []
+    return [
+        {"id": r["id"], "program": r["program"], "filename": r["filename"],
+         "created_at": r["created_at"], "snippet": _highlight(r["snippet"]), "score": r["score"]}
+        for r in rows
+    ]
 
 @main_bp.route("/")
 def index():
@@ -11,19 +40,45 @@ def index():
         trs = db.execute("SELECT id, program, filename, created_at FROM transcripts ORDER BY id DESC LIMIT 8").fetchall()
         reqs = db.execute("SELECT username, platform, message, status, created_at FROM requests ORDER BY id DESC LIMIT 8").fetchall()
     cp = current_program()
-    return render_template("index.html", transcripts=trs, reqs=reqs, cp=cp)
+    return render_template("index.html", transcripts=trs, reqs=reqs, cp=cp, summary_mode=SUMMARY_MODE)
 
 @main_bp.route("/transcripts")
 def transcripts():
-    with get_db() as db:
-        rows = db.execute("SELECT id, program, filename, created_at FROM transcripts ORDER BY id DESC").fetchall()
-    return render_template("transcripts.html", rows=rows)
+    q = (request.args.get("q") or "").strip()
+    if q:
+        return render_template("transcripts.html", rows=[], q=q, results=_search(q), filters={}, next_cursor=None)
+    filters = _list_filters("program")
+    rows, next_cursor = list_transcripts(**filters, before=request.args.get("before", type=int), limit=PAGE_SIZE)
+    return render_template("transcripts.html", rows=rows, q="", results=None,
+                           filters=filters, next_cursor=next_cursor)
+
+@main_bp.get("/api/transcripts/search")
+def api_transcripts_search():
+    q = (request.args.get("q") or "").strip()
+    limit = min(max(request.args.get("limit", 20, type=int), 1), 100)
+    results = _search(q, limit=limit)
+    for r in results:
+        r["snippet"] = str(r["snippet"])
+    return jsonify({"q": q, "results": results})
 
 @main_bp.route("/requests")
 def requests_view():
-    with get_db() as db:
-        rows = db.execute("SELECT username, platform, message, status, created_at FROM requests ORDER BY id DESC").fetchall()
-    return render_template("requests.html", rows=rows)
+    filters = _list_filters("status", "platform")
+    rows, next_cursor = list_requests(**filters, before=request.args.get("before", type=int), limit=PAGE_SIZE)
+    window = request.args.get("window") if request.args.get("window") in LEADERBOARD_WINDOWS else "day"
+    board = request_leaderboard(window, platform=filters["platform"], limit=10)
+    page_args = dict(filters, window=window if request.args.get("window") else None)  # pager membawa jendela leaderboard
+    return render_template("requests.html", rows=rows, filters=filters, page_args=page_args, next_cursor=next_cursor,
+                           statuses=request_statuses(), board=board, windows=list(LEADERBOARD_WINDOWS))
+
+@main_bp.get("/api/requests/leaderboard")
+def api_requests_leaderboard():
+    window = request.args.get("window") or "day"
+    if window not in LEADERBOARD_WINDOWS:
+        return jsonify({"error": f"window harus salah satu dari: {', '.join(LEADERBOARD_WINDOWS)}"}), 400
+    platform = (request.args.get("platform") or "").strip() or None
+    limit = min(max(request.args.get("limit", 10, type=int), 1), 100)
+    return jsonify(request_leaderboard(window, platform=platform, limit=limit))
 
 # Perhatikan UPLOAD_DIR di config.py sudah diubah ke parent folder
 @main_bp.route("/uploads/<path:fname>")
@@ -7,10 +7,10 @@ from werkzeug.utils import secure_filename
 from . import minutes_bp
 from ..database import get_db
 from ..config import DEFAULT_META, UPLOAD_DIR, ALLOWED_IMG, log
-from ..utils import build_minutes_gpt, build_docx_from_minutes
+from ..utils import build_minutes_gpt, build_docx_from_minutes, get_minutes_buckets
 
-@minutes_bp.get("/transcripts/<int:tid>/minutes")
-def transcript_minutes(tid: int):
+def _load_minutes_source(tid: int):
+    """Baris transkrip + meta notulen; abort 404 bila tidak ada."""
     with get_db() as db:
         row = db.execute(
             "SELECT id, program, filename, "
@@ -26,7 +26,14 @@ def transcript_minutes(tid: int):
             meta.update(json.loads(row["minutes_meta"]))
         except Exception:
             pass
-    minutes = build_minutes_gpt(row["transcript"], row["summary"], row["program"], row["created_at"], meta=meta)
+    return row, meta
+
+@minutes_bp.get("/transcripts/<int:tid>/minutes")
+def transcript_minutes(tid: int):
+    row, meta = _load_minutes_source(tid)
+    buckets = get_minutes_buckets(tid, row["transcript"], row["summary"], meta)
+    minutes = build_minutes_gpt(row["transcript"], row["summary"], row["program"], row["created_at"],
+                                meta=meta, buckets=buckets)
     return render_template("minutes.html", tr=row, minutes=minutes, meta=meta)
 
 @minutes_bp.get("/transcripts/<int:tid>/minutes/edit")
@@ -94,24 +101,12 @@ def upload_logo():
 
 @minutes_bp.get("/transcripts/<int:tid>/minutes.docx")
 def minutes_docx(tid: int):
-    with get_db() as db:
-        row = db.execute(
-            "SELECT id, program, filename, "
-            "COALESCE(cleaned_transcript, transcript) AS transcript, "  # ← pakai teks bersih jika ada
-            "created_at, COALESCE(summary,'') summary, COALESCE(minutes_meta,'') minutes_meta "
-            "FROM transcripts WHERE id=?",
-            (tid,),
-        ).fetchone()
-    if not row: abort(404)
-    meta = DEFAULT_META.copy()
-    if row["minutes_meta"]:
-        try:
-            meta.update(json.loads(row["minutes_meta"]))
-        except Exception:
-            pass
-    minutes = build_minutes_gpt(row["transcript"], row["summary"], row["program"], row["created_at"], meta=meta)
+    row, meta = _load_minutes_source(tid)
+    buckets = get_minutes_buckets(tid, row["transcript"], row["summary"], meta)
+    minutes = build_minutes_gpt(row["transcript"], row["summary"], row["program"], row["created_at"],
+                                meta=meta, buckets=buckets)
     try:
-        bio = build_docx_from_minutes(minutes, meta, dict(row))
+        bio = build_docx_from_minutes(minutes, meta, dict(row), buckets=buckets)
     except Exception as e:
         abort(500, description=str(e))
 
@@ -1,15 +1,17 @@
 # sebayu_app/routes/transcription.py
-import threading
 import uuid
 from flask import request, redirect, url_for, flash, render_template, abort, Response, jsonify
-import json
 from werkzeug.utils import secure_filename
 
 from . import transcription_bp
-from ..config import UPLOAD_DIR, ALLOWED_AUDIO, PROGRESS
-from ..database import get_db
-from ..utils import allowed_file, run_transcribe_job
-from ..textclean import clean_text_id  # <--- DITAMBAHKAN
+from ..config import UPLOAD_DIR, ALLOWED_AUDIO, SUMMARY_MODE, SUMMARY_MODES, log
+from ..database import get_db, get_transcript_segments
+from ..jobs import PRIORITY_HIGH, PRIORITY_NORMAL, PRIORITY_LOW
+from ..utils import (
+    allowed_file, submit_transcribe_job, cancel_transcribe_job, submit_reclean_job, set_progress,
+    iter_progress_events, incremental_clean_text, MODEL_MANAGER, TRANSCRIBE_QUEUE, NOW_PLAYING,
+    REQUEST_BUFFER
+)
 
 @transcription_bp.route("/transcribe", methods=["POST"])
 def transcribe():
@@ -20,6 +22,10 @@ def transcribe():
     manual_choice = request.form.get("model_choice") or "small"
     do_chunk = True if request.form.get("chunk") == "on" else False
     do_summary = True if request.form.get("summary") == "on" else False
+    summary_mode = request.form.get("summary_mode") or SUMMARY_MODE
+    if summary_mode not in SUMMARY_MODES:
+        summary_mode = SUMMARY_MODE
+    priority = {"high": PRIORITY_HIGH, "low": PRIORITY_LOW}.get(request.form.get("priority") or "", PRIORITY_NORMAL)
 
     f = request.files["audio"]
     if f.filename == "":
@@ -32,12 +38,9 @@ def transcribe():
     f.save(save_path)
 
     job_id = str(uuid.uuid4())
-    PROGRESS[job_id] = {"pct": 5, "msg": "Unggahan diterima", "done": False, "error": None, "tid": None}
-    t = threading.Thread(
-        target=run_transcribe_job,
-        args=(job_id, save_path, program, mode, manual_choice, do_chunk, do_summary),
-        daemon=True
-    ); t.start()
+    set_progress(job_id, 5, "Unggahan diterima")
+    submit_transcribe_job(job_id, save_path, program, mode, manual_choice, do_chunk, do_summary, priority=priority,
+                          summary_mode=summary_mode)
     return redirect(url_for("transcription.progress_page", job_id=job_id))
 
 @transcription_bp.route("/transcripts/<int:tid>")
@@ -52,35 +55,71 @@ def transcript_detail(tid: int):
     if not row: abort(404)
     return render_template("transcript_detail.html", tr=row)
 
+@transcription_bp.get("/transcripts/<int:tid>/segments.json")
+def transcript_segments(tid: int):
+    """Segmen bertimestamp; ?start=&end= (detik) untuk rentang tertentu, mis. sinkron pemutar audio."""
+    start = request.args.get("start", type=float)
+    end = request.args.get("end", type=float)
+    rows = get_transcript_segments(tid, start, end)
+    return jsonify([
+        {"part": r["part"], "start": r["start_sec"], "end": r["end_sec"],
+         "avg_logprob": r["avg_logprob"], "text": r["text"]}
+        for r in rows
+    ])
+
 # --- Halaman Progres + SSE ---
 @transcription_bp.get("/progress/<job_id>")
 def progress_page(job_id: str):
-    if job_id not in PROGRESS:
-        PROGRESS[job_id] = {"pct":0,"msg":"Menyiapkan…","done":False,"error":None,"tid":None}
     return render_template("progress.html", job_id=job_id)
 
+@transcription_bp.post("/progress/<job_id>/cancel")
+def progress_cancel(job_id: str):
+    if cancel_transcribe_job(job_id):
+        flash("Permintaan pembatalan dikirim.")
+    else:
+        flash("Job tidak ditemukan atau sudah selesai.")
+    return redirect(url_for("transcription.progress_page", job_id=job_id))
+
 @transcription_bp.get("/events/<job_id>")
 def events(job_id: str):
-    def stream():
-        while True:
-            state = PROGRESS.get(job_id) or {"pct":0,"msg":"Menunggu…","done":False}
-            yield f"data: {json.dumps(state)}\n\n"
-            import time; time.sleep(1)
-    return Response(stream(), mimetype="text/event-stream")
+    # EventSource mengirim Last-Event-ID sendiri saat reconnect → lanjut dari event terakhir
+    try:
+        last_seq = int(request.headers.get("Last-Event-ID") or 0)
+    except ValueError:
+        last_seq = 0
+    resp = Response(iter_progress_events(job_id, last_seq), mimetype="text/event-stream")
+    resp.headers["Cache-Control"] = "no-cache"
+    resp.headers["X-Accel-Buffering"] = "no"  # nginx: jangan buffer stream
+    return resp
+
+@transcription_bp.get("/api/engine/stats")
+def engine_stats():
+    return jsonify({"models": MODEL_MANAGER.stats(), "queue": TRANSCRIBE_QUEUE.stats(),
+                    "nowplaying": NOW_PLAYING.stats(), "requests": REQUEST_BUFFER.stats()})
 
 # --- Tambahan: tombol bersihkan manual ---
 @transcription_bp.post("/transcripts/<int:tid>/clean")
 def transcript_clean(tid: int):
     with get_db() as db:
         row = db.execute("SELECT transcript FROM transcripts WHERE id=?", (tid,)).fetchone()
-        if not row:
-            abort(404)
-        cleaned = clean_text_id(row["transcript"]) if row["transcript"] else ""
+    if not row:
+        abort(404)
+    # dibersihkan di luar transaksi; paragraf yang tidak berubah diambil dari cache
+    cleaned = incremental_clean_text(row["transcript"]) if row["transcript"] else ""
+    with get_db() as db:
         db.execute("UPDATE transcripts SET cleaned_transcript=? WHERE id=?", (cleaned, tid))
         db.commit()
     flash("Transkrip dibersihkan.")
     return redirect(url_for("transcription.transcript_detail", tid=tid))
 
+@transcription_bp.post("/transcripts/reclean")
+def transcripts_reclean():
+    """Bersihkan ulang seluruh arsip (mis. setelah daftar FILLERS/REPLACEMENTS diubah) sebagai job antrean."""
+    job_id = str(uuid.uuid4())
+    set_progress(job_id, 0, "Menunggu antrean")
+    submit_reclean_job(job_id)
+    return redirect(url_for("transcription.progress_page", job_id=job_id))
+
 @transcription_bp.post("/transcripts/<int:tid>/delete")
 def transcript_delete(tid: int):
     with get_db() as db:
@@ -99,6 +138,7 @@ def transcript_delete(tid: int):
             log.warning(f"Gagal hapus file audio: {e}")
 
         # hapus row dari database
+        db.execute("DELETE FROM transcript_segments WHERE transcript_id=?", (tid,))
         db.execute("DELETE FROM transcripts WHERE id=?", (tid,))
         db.commit()
 
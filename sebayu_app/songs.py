@@ -0,0 +1,53 @@
+# my_flask_app/sebayu_app/songs.py
+import re
+import unicodedata
+from typing import NamedTuple
+
+# Pesan request bebas ("Kangen - Dewa 19", "putar lagu Separuh Aku by NOAH") → judul & artis.
+# Kunci lagu dinormalisasi (huruf kecil, tanpa aksen/tanda baca/keterangan dalam kurung/feat.)
+# supaya "Kangen – DEWA 19!!" dan "kangen - dewa 19 (live)" dihitung sebagai lagu yang sama.
+RE_SONG_SEPARATOR = re.compile(r"\s+(?:-|–|—|by|oleh)\s+", re.I)
+RE_SONG_LEADING = re.compile(
+    r"^(?:(?:tolong|mohon|minta)\s+)?(?:(?:putar(?:kan|in)?|puterin|play)\s+)?(?:(?:lagu(?:nya)?|judul)\s*:?\s+)?",
+    re.I,
+)
+RE_SONG_BRACKETS = re.compile(r"[(\[{][^)\]}]*[)\]}]")
+RE_SONG_FEAT = re.compile(r"\s+(?:feat\.?|ft\.?|featuring)\s+.*$", re.I)
+RE_SONG_NON_WORD = re.compile(r"[\W_]+")
+
+class SongRequest(NamedTuple):
+    key: str        # "judul|artis" ternormalisasi, dipakai sebagai kunci agregat
+    title: str      # tampilan (teks asli yang dirapikan)
+    artist: str
+
+def normalize_song_part(s: str) -> str:
+    s = unicodedata.normalize("NFKD", s)
+    s = "".join(ch for ch in s if not unicodedata.combining(ch))
+    s = RE_SONG_FEAT.sub("", RE_SONG_BRACKETS.sub(" ", s))
+    return RE_SONG_NON_WORD.sub(" ", s.lower()).strip()
+
+def parse_song_request(message: str) -> SongRequest:
+    """Pisah di pemisah terakhir (" - ", " by ", " oleh "); tanpa pemisah → seluruhnya judul."""
+    text = " ".join((message or "").split())
+    stripped = RE_SONG_LEADING.sub("", text)
+    if stripped and not RE_SONG_SEPARATOR.match(" " + stripped):  # "Lagu - Artis": "Lagu" memang judulnya
+        text = stripped
+    parts = RE_SONG_SEPARATOR.split(text)
+    if len(parts) > 1:
+        title = " - ".join(parts[:-1]).strip()
+        artist = parts[-1].strip()
+    else:
+        title, artist = text.strip(), ""
+    key = f"{normalize_song_part(title)}|{normalize_song_part(artist)}"
+    return SongRequest(key, title, artist)
+
+# Nama bawaan klien chat tanpa nama (routes/chatbot.py & static/chat.js): banyak pendengar berbeda
+# memakai nama yang sama, jadi request mereka tidak boleh di-dedupe sebagai "user yang sama".
+ANONYMOUS_USERNAMES = frozenset({"", "web-user"})
+
+def song_request_dedupe_key(username: str, platform: str, message: str) -> tuple | None:
+    """Kunci dedupe (platform, user, lagu); None untuk pengirim anonim (tidak di-dedupe)."""
+    user = (username or "").strip().lower()
+    if user in ANONYMOUS_USERNAMES:
+        return None
+    return (platform, user, parse_song_request(message).key)
@@ -0,0 +1,145 @@
+# my_flask_app/sebayu_app/summarizer.py
+import re
+from typing import List, Sequence
+
+import numpy as np
+
+# Ringkasan ekstraktif berbasis TF-IDF (NumPy, tanpa scipy).
+# Matriks kalimat × term disimpan sparse sebagai (rows, terms, data) — format COO/CSR sederhana;
+# semua perkalian matriks-vektor memakai np.bincount, jadi biaya O(jumlah token), bukan O(kalimat²).
+# - "tfidf":    skor = cosine kalimat ke centroid dokumen.
+# - "textrank": PageRank di graf kemiripan cosine antar kalimat; S = X·Xᵀ tidak pernah dibentuk,
+#               tiap iterasi dihitung sebagai X·(Xᵀ·v).
+# Banyak transkrip bisa diproses sekaligus (summarize_many): satu kosakata & IDF bersama,
+# centroid/graf tetap per dokumen.
+
+RE_SENT_SPLIT = re.compile(r"(?<=[.!?])\s+|\n{2,}")
+RE_TERM = re.compile(r"[^\W\d_]{2,}")
+STOPWORDS = frozenset("""
+yang dan di ke dari ini itu untuk dengan pada adalah dalam akan juga tidak ada atau sudah bisa
+kita kami saya anda kamu mereka dia ia nya pun lah kah jadi karena agar supaya oleh sebagai
+seperti saat ketika bahwa tersebut para masih lebih sangat telah belum harus hanya sama
+ya iya eh oh nah kan sih dong deh gitu terus lalu kalau kalo jika maka tapi tetapi namun
+""".split())
+
+# Satu-satunya daftar kata kunci ringkasan. Mode "keyword" (utils._score_sentence) memakai daftar ini
+# apa adanya dengan aturan lamanya (substring pada teks huruf kecil, jadi entri berhuruf besar tidak
+# pernah cocok di sana); mode tfidf/textrank memakai RE_KEYWORDS yang lebih ketat.
+SUMMARY_KEYWORDS = [
+    "keputusan","tindak lanjut","action","deadline","anggaran","solusi","usulan",
+    "disepakati","menyetujui","ditetapkan","menetapkan","menugaskan","PIC","owner",
+    "target","paling lambat","KUA","PPAS","TAPD","RKPD"
+]
+_KEYWORDS_LOWER = [k.lower() for k in SUMMARY_KEYWORDS]
+# singkatan (≤ 4 huruf) harus kata utuh ("kua" ≠ "kuasa"); kata panjang cukup awalan ("disepakatinya")
+RE_KEYWORDS = re.compile(
+    r"\b(?:" + "|".join(re.escape(k) for k in sorted(_KEYWORDS_LOWER, key=len, reverse=True) if len(k) > 4) + r")"
+    r"|\b(?:" + "|".join(re.escape(k) for k in _KEYWORDS_LOWER if len(k) <= 4) + r")\b"
+)
+KEYWORD_BOOST = 0.15    # per kata kunci berbeda; skor relevansi dinormalisasi 0..1 per dokumen
+MIN_TERMS = 3           # kalimat dengan < 3 term bermakna tidak dipilih
+
+def split_sentences(text: str) -> List[str]:
+    return [s2 for s2 in (s.strip() for s in RE_SENT_SPLIT.split(text or "")) if s2]
+
+def _term_matrix(docs: Sequence[List[str]]):
+    """
+    Bangun matriks sparse TF-IDF ter-normalisasi baris untuk semua kalimat semua dokumen.
+    Return (doc_of_row, rows, terms, data, n_terms_per_row).
+    """
+    vocab: dict = {}
+    row_ids, term_ids, doc_of_row = [], [], []
+    r = 0
+    for d, sents in enumerate(docs):
+        for s in sents:
+            for tok in RE_TERM.findall(s.lower()):
+                if tok not in STOPWORDS:
+                    row_ids.append(r)
+                    term_ids.append(vocab.setdefault(tok, len(vocab)))
+            doc_of_row.append(d)
+            r += 1
+    n_rows, n_terms = r, max(1, len(vocab))
+    doc_of_row = np.asarray(doc_of_row, dtype=np.int64)
+    if not row_ids:
+        empty = np.zeros(0)
+        return doc_of_row, empty.astype(np.int64), empty.astype(np.int64), empty, np.zeros(n_rows)
+
+    # pasangan (kalimat, term) unik + frekuensinya; urut per kalimat (CSR)
+    keys, counts = np.unique(np.asarray(row_ids, dtype=np.int64) * n_terms + np.asarray(term_ids), return_counts=True)
+    rows, terms = keys // n_terms, keys % n_terms
+    df = np.bincount(terms, minlength=n_terms)
+    idf = np.log((1 + n_rows) / (1 + df)) + 1.0
+    data = (1.0 + np.log(counts)) * idf[terms]
+    norms = np.sqrt(np.bincount(rows, weights=data * data, minlength=n_rows))
+    data = data / norms[rows]
+    return doc_of_row, rows, terms, data, np.bincount(rows, minlength=n_rows)
+
+def _doc_term_index(doc_of_row, rows, terms):
+    """Indeks (dokumen, term) untuk tiap nonzero → reduksi per dokumen via bincount."""
+    keys, inv = np.unique(doc_of_row[rows] * (terms.max() + 1) + terms, return_inverse=True)
+    return inv.reshape(-1), len(keys)
+
+def _scores_tfidf(doc_of_row, rows, terms, data, n_rows):
+    inv, n_keys = _doc_term_index(doc_of_row, rows, terms)
+    centroid = np.bincount(inv, weights=data, minlength=n_keys)  # Σ baris per (dokumen, term)
+    key_doc = np.zeros(n_keys, dtype=np.int64)
+    key_doc[inv] = doc_of_row[rows]
+    c_norm = np.sqrt(np.bincount(key_doc, weights=centroid * centroid, minlength=doc_of_row.max() + 1))
+    dots = np.bincount(rows, weights=data * centroid[inv], minlength=n_rows)
+    return dots / np.where(c_norm > 0, c_norm, 1.0)[doc_of_row]
+
+def _scores_textrank(doc_of_row, rows, terms, data, n_rows, damping=0.85, iters=30, tol=1e-6):
+    inv, n_keys = _doc_term_index(doc_of_row, rows, terms)
+    has_terms = np.bincount(rows, minlength=n_rows) > 0
+
+    def sim_times(v):  # (S − I)·v dengan S = X·Xᵀ per dokumen (diagonal cosine = 1 untuk baris tak kosong)
+        xt_v = np.bincount(inv, weights=data * v[rows], minlength=n_keys)
+        return np.bincount(rows, weights=data * xt_v[inv], minlength=n_rows) - v * has_terms
+
+    deg = sim_times(np.ones(n_rows))
+    inv_deg = np.divide(1.0, deg, out=np.zeros(n_rows), where=deg > 1e-12)
+    n_per_doc = np.bincount(doc_of_row).astype(float)[doc_of_row]
+    r = 1.0 / n_per_doc
+    for _ in range(iters):
+        r_new = (1 - damping) / n_per_doc + damping * sim_times(r * inv_deg)
+        if np.abs(r_new - r).max() < tol:
+            r = r_new
+            break
+        r = r_new
+    return r
+
+def _pick(sents: List[str], rel: np.ndarray, n_terms: np.ndarray, max_sentences: int) -> str:
+    top = rel.max() if len(rel) else 0.0
+    score = rel / top if top > 0 else rel.copy()
+    score += KEYWORD_BOOST * np.array([len(set(RE_KEYWORDS.findall(s.lower()))) for s in sents])
+    score[n_terms < MIN_TERMS] = -np.inf
+    candidates = np.flatnonzero(np.isfinite(score))
+    if not len(candidates):
+        return "- (tidak cukup konten untuk diringkas)"
+    # skor tertinggi (seri → kalimat lebih awal), lalu ditampilkan urut kemunculan
+    order = candidates[np.lexsort((candidates, -score[candidates]))][:max_sentences]
+    return "\n".join(f"- {sents[i]}" for i in sorted(order))
+
+def summarize_many(texts: Sequence[str], max_sentences: int = 18, mode: str = "tfidf") -> List[str]:
+    """Ringkas banyak teks sekaligus (kosakata & IDF bersama). mode = "tfidf" | "textrank"."""
+    if mode not in ("tfidf", "textrank"):
+        raise ValueError(f"Mode ringkasan tidak dikenal: {mode}")
+    docs = [split_sentences(t) for t in texts]
+    if not any(docs):
+        return ["- (tidak cukup konten untuk diringkas)" for _ in docs]
+    doc_of_row, rows, terms, data, n_terms = _term_matrix(docs)
+    n_rows = len(doc_of_row)
+    if len(rows):
+        scorer = _scores_textrank if mode == "textrank" else _scores_tfidf
+        rel = scorer(doc_of_row, rows, terms, data, n_rows)
+    else:
+        rel = np.zeros(n_rows)
+    out, start = [], 0
+    for sents in docs:
+        end = start + len(sents)
+        out.append(_pick(sents, rel[start:end], n_terms[start:end], max_sentences))
+        start = end
+    return out
+
+def summarize(text: str, max_sentences: int = 18, mode: str = "tfidf") -> str:
+    return summarize_many([text], max_sentences, mode)[0]
@@ -1,5 +1,9 @@
 # sebayu_app/textclean.py
+import hashlib
+import itertools
 import re
+from functools import lru_cache
+from typing import Iterable, Iterator
 
 FILLERS = {
     # filler umum
@@ -22,9 +26,27 @@ REPLACEMENTS = {
 
 RE_LAUGH = re.compile(r"\b(?:wkwk+|haha+|hehe+|hihi+|kwkw+|lol|lmao|rofl)\b", re.I)
 RE_EMOJI = re.compile(r"[\U0001F300-\U0001FAFF\U00002700-\U000027BF\U00002600-\U000026FF]")
+RE_REPEAT = re.compile(r"(.)\1{2,}")
+RE_SENTENCE = re.compile(r"(?<=[.!?])\s+|\n+")
+RE_SPACES = re.compile(r"\s+")
+RE_SPACE_COMMA = re.compile(r"\s+,")
+RE_SPACE_DOT = re.compile(r"\s+\.")
+RE_LONELY_CONNECTOR = re.compile(r"\b(?:terus|lalu|jadi|nah)\b\s*(?:,|\.|$)", re.I)
+
+# --- Tabel yang dihitung sekali saat import ---
+# urutan pengecekan filler (terpanjang dulu) + rank-nya, dipakai _strip_fillers
+FILLERS_BY_LEN = sorted(FILLERS, key=len, reverse=True)
+_FILLER_RANK = {f: i for i, f in enumerate(FILLERS_BY_LEN)}
+_FILLER_MAX_SPACES = max(f.count(" ") for f in FILLERS)
+# singkatan → token pengganti (kosong = dibuang)
+_REPLACEMENT_TOKENS = {k: tuple(v.split()) for k, v in REPLACEMENTS.items()}
+# sidik jari aturan: berubah bila FILLERS/REPLACEMENTS diubah (kunci cache hasil bersih per paragraf)
+RULES_FINGERPRINT = hashlib.sha256(
+    repr((sorted(FILLERS), sorted(REPLACEMENTS.items()), RE_LAUGH.pattern, RE_EMOJI.pattern)).encode("utf-8")
+).hexdigest()[:16]
 
 def _squash_repeats(token: str) -> str:
-    return re.sub(r"(.)\1{2,}", r"\1\1", token)
+    return RE_REPEAT.sub(r"\1\1", token)
 
 def _normalize_token(tok: str) -> str:
     t = RE_LAUGH.sub("", tok)
@@ -33,53 +55,97 @@ def _normalize_token(tok: str) -> str:
     t = _squash_repeats(t)
     return t
 
+@lru_cache(maxsize=65536)
+def _token_table(tok: str) -> tuple:
+    """
+    Token mentah → ((token_hasil, is_filler), ...): normalisasi + penggantian singkatan sekaligus.
+    Token transkrip sangat berulang, jadi hasilnya di-cache.
+    """
+    t = _normalize_token(tok)
+    low = t.lower()
+    if low in _REPLACEMENT_TOKENS:
+        return tuple((r, r.lower() in FILLERS) for r in _REPLACEMENT_TOKENS[low])
+    return ((t, low in FILLERS),)
+
+def _filler_edges(low: str, suffix: bool) -> list:
+    """Filler yang cocok sebagai `f + " "` di awal (atau `" " + f` di akhir) `low`."""
+    found = []
+    if suffix:
+        pos = len(low)
+        for _ in range(_FILLER_MAX_SPACES + 1):
+            pos = low.rfind(" ", 0, pos)
+            if pos < 0:
+                break
+            if low[pos + 1:] in _FILLER_RANK:
+                found.append(low[pos + 1:])
+    else:
+        pos = -1
+        for _ in range(_FILLER_MAX_SPACES + 1):
+            pos = low.find(" ", pos + 1)
+            if pos < 0:
+                break
+            if low[:pos] in _FILLER_RANK:
+                found.append(low[:pos])
+    return found
+
 def _strip_fillers(sentence: str) -> str:
+    """
+    Buang filler di awal/akhir kalimat (3 putaran). Setara dengan mengecek FILLERS_BY_LEN satu per satu,
+    tapi hanya kandidat yang memang berupa prefix/suffix per kata yang diperiksa.
+    """
     s = sentence.strip()
+    low = s.lower()
     for _ in range(3):
-        low = s.lower()
-        for f in sorted(FILLERS, key=len, reverse=True):
-            if low.startswith(f + " "):
-                s = s[len(f):].lstrip(); low = s.lower()
-        for f in sorted(FILLERS, key=len, reverse=True):
-            if low.endswith(" " + f):
-                s = s[:-len(f)].rstrip(); low = s.lower()
+        changed = False
+        for suffix in (False, True):
+            after = -1  # dalam satu putaran, filler dicek berurutan sesuai FILLERS_BY_LEN
+            while True:
+                ranks = [r for r in map(_FILLER_RANK.get, _filler_edges(low, suffix)) if r > after]
+                if not ranks:
+                    break
+                after = min(ranks)
+                f = FILLERS_BY_LEN[after]
+                s = s[:-len(f)].rstrip() if suffix else s[len(f):].lstrip()
+                low, changed = s.lower(), True
+        if not changed:
+            break  # putaran berikutnya pasti sama
     return s
 
 def _drop_lonely_connectors(s: str) -> str:
-    return re.sub(r"\b(?:terus|lalu|jadi|nah)\b\s*(?:,|\.|$)", ".", s, flags=re.I)
+    return RE_LONELY_CONNECTOR.sub(".", s)
+
+def _clean_sentence(s: str) -> str:
+    norm = [pair for t in RE_SPACES.split(s) if t for pair in _token_table(t)]
+    if len(norm) <= 5:
+        s2 = " ".join(t for t, is_filler in norm if not is_filler)
+    else:
+        s2 = " ".join(t for t, _ in norm)
+    s2 = _strip_fillers(s2)
+    s2 = _drop_lonely_connectors(s2)
+    s2 = RE_SPACE_COMMA.sub(",", s2)
+    s2 = RE_SPACE_DOT.sub(".", s2)
+    return RE_SPACES.sub(" ", s2).strip()
+
+def iter_clean_text_id(lines: Iterable[str], aggressive: bool = True) -> Iterator[str]:
+    """
+    Versi streaming clean_text_id: `lines` = potongan teks berurutan (baris file, chunk DB, dst.),
+    hasilnya kalimat bersih satu per satu. Memori ≈ satu kalimat (sisa kalimat yang belum selesai
+    dibawa ke potongan berikutnya). "\n".join(iter_clean_text_id(chunks)) == clean_text_id("".join(chunks)).
+    """
+    carry = ""
+    for chunk in itertools.chain(lines, [None]):
+        final = chunk is None
+        pieces = RE_SENTENCE.split(carry if final else carry + chunk)
+        carry = "" if final else pieces.pop()  # potongan terakhir mungkin masih berlanjut
+        for s in pieces:
+            if not s.strip():
+                continue
+            s2 = _clean_sentence(s)
+            # baris < 3 karakter dibuang pada mode aggressive (s2 sudah tanpa baris baru)
+            if s2 and (not aggressive or len(s2) >= 3):
+                yield s2
 
 def clean_text_id(text: str, aggressive: bool = True) -> str:
     if not text or not text.strip():
         return text
-    sentences = re.split(r"(?<=[.!?])\s+|\n+", text)
-    out = []
-    for s in sentences:
-        if not s.strip():
-            continue
-        toks = [_normalize_token(t) for t in re.split(r"\s+", s) if t]
-        norm = []
-        for t in toks:
-            low = t.lower()
-            if low in REPLACEMENTS:
-                rep = REPLACEMENTS[low]
-                if rep:
-                    norm.extend(rep.split())
-            else:
-                norm.append(t)
-        pruned = []
-        for t in norm:
-            if t.lower() in FILLERS and len(norm) <= 5:
-                continue
-            pruned.append(t)
-        s2 = " ".join(pruned)
-        s2 = _strip_fillers(s2)
-        s2 = _drop_lonely_connectors(s2)
-        s2 = re.sub(r"\s+,", ",", s2)
-        s2 = re.sub(r"\s+\.", ".", s2)
-        s2 = re.sub(r"\s+", " ", s2).strip()
-        if s2:
-            out.append(s2)
-    cleaned = "\n".join(out)
-    if aggressive:
-        cleaned = "\n".join([ln for ln in cleaned.splitlines() if len(ln.strip()) >= 3])
-    return cleaned
\ No newline at end of file
+    return "\n".join(iter_clean_text_id((text,), aggressive))
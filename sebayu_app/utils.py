@@ -1,27 +1,55 @@
 # my_flask_app/sebayu_app/utils.py
 import os
+import hashlib
 import subprocess
 import tempfile
 import shutil
 import re
 import requests
 import json
+import heapq
+import itertools
+import queue
 import threading
 import uuid
 import time
+import wave
+import zlib
 from io import BytesIO
 from urllib.parse import urlparse
 from pathlib import Path
-from typing import Optional, Tuple, List, Dict
+from typing import Optional, Tuple, List, Dict, Iterable, Iterator, Union
+from dataclasses import dataclass, field
+from functools import lru_cache
+from contextlib import ExitStack, contextmanager
 from datetime import datetime
 
+import numpy as np
 from faster_whisper import WhisperModel
 
 from .config import (
-    UPLOAD_DIR, ALLOWED_AUDIO, HAVE_DOCX, log, PROGRESS, DEFAULT_META, PROJECT_ROOT
+    UPLOAD_DIR, ALLOWED_AUDIO, HAVE_DOCX, log, PROGRESS, DEFAULT_META,
+    WHISPER_CHUNK_WORKERS, WHISPER_CPU_THREADS, WHISPER_POOL,
+    TRANSCRIBE_SLOTS, TRANSCRIBE_MEM_MB, JOB_CANCEL_POLL_SECONDS, MODEL_MEM_MB, AUDIO_CACHE_DIR, AUDIO_CACHE_MB,
+    AUDIO_DECODE, STREAM_WINDOW_SECONDS, VAD_CHUNKING, CHUNK_TARGET_SECONDS, VAD_MIN_SILENCE_MS,
+    MODEL_CACHE_MB, WHISPER_PRELOAD, RECLEAN_WORKERS, RECLEAN_BATCH, SUMMARY_MODE,
+    NOWPLAYING_URL, NOWPLAYING_TTL, NOWPLAYING_MAX_STALE, NOWPLAYING_TIMEOUT,
+    REQUEST_BATCH_SIZE, REQUEST_FLUSH_SECONDS, REQUEST_DEDUPE_SECONDS, REQUEST_SPOOL_PATH
 )
-from .database import get_db, now_str, current_program, get_today_schedule_text
-from .textclean import clean_text_id  # <--- Cleaner terintegrasi
+from .database import (
+    get_db, now_str, current_program, get_today_schedule_text, save_job_state, load_job_state,
+    save_transcript_segments, load_minutes_cache, save_minutes_cache, load_paragraph_cache, save_paragraph_cache,
+    insert_requests, pid_alive, request_job_cancel, job_cancel_requested, iter_transcript_column
+)
+from .textclean import clean_text_id, iter_clean_text_id, RULES_FINGERPRINT as TEXTCLEAN_RULES  # <--- Cleaner terintegrasi
+from .model_manager import ModelManager
+from .keyword_matcher import KeywordMatcher
+from .summarizer import SUMMARY_KEYWORDS, summarize as summarize_vector
+from .nowplaying import NowPlayingCache
+from .chat_router import IntentRouter, ChatMessage
+from .write_buffer import WriteBehindBuffer
+from .songs import song_request_dedupe_key
+from .jobs import JobScheduler, JobCancelled, ProgressHub, PRIORITY_NORMAL, PRIORITY_LOW
 
 # (opsional) ambil preferensi device/compute dari env via config; fallback aman
 try:
@@ -48,39 +76,370 @@ def ffprobe_duration(path: Path) -> float:
         log.error(f"ffprobe parse error: {e}")
         return 0.0
 
-def ffmpeg_preprocess(in_path: Path) -> Path:
-    out_path = in_path.with_suffix("")
-    out_path = Path(str(out_path) + "__16k.wav")
-    cmd = [
-        "ffmpeg", "-y", "-i", str(in_path),
-        "-ac", "1", "-ar", "16000", "-vn",
-        "-af", "loudnorm=I=-16:TP=-2:LRA=11",
-        str(out_path)
-    ]
-    subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    return out_path
+LOUDNORM_FILTER = "loudnorm=I=-16:TP=-2:LRA=11"
+SAMPLE_RATE = 16000
+
+@dataclass
+class AudioChunk:
+    """
+    Bagian audio hasil VAD: hanya ucapan (jeda panjang dibuang).
+    `spans` = [(offset_di_chunk, offset_di_sumber, panjang)] dalam sampel,
+    untuk memetakan timestamp Whisper kembali ke waktu rekaman asli.
+    """
+    audio: np.ndarray
+    spans: List[Tuple[int, int, int]] = field(default_factory=list)
+
+    @property
+    def speech_seconds(self) -> float:
+        return sum(n for _, _, n in self.spans) / SAMPLE_RATE
+
+    def source_time(self, t: float) -> float:
+        pos = int(t * SAMPLE_RATE)
+        for c_off, s_off, n in self.spans:
+            if pos < c_off + n:
+                return (s_off + max(0, pos - c_off)) / SAMPLE_RATE
+        if not self.spans:
+            return t
+        c_off, s_off, n = self.spans[-1]
+        return (s_off + n) / SAMPLE_RATE
+
+# Potongan audio untuk Whisper: path file WAV, array float32 16 kHz mono, atau AudioChunk
+AudioInput = Union[Path, np.ndarray, AudioChunk]
+
+@dataclass
+class Segment:
+    """Satu segmen hasil Whisper; start/end dalam detik rekaman asli."""
+    start: float
+    end: float
+    text: str
+    avg_logprob: float = 0.0
+    part: int = 0
+
+    def as_dict(self) -> dict:
+        return {"part": self.part, "start": round(self.start, 2), "end": round(self.end, 2), "text": self.text}
+
+def _audio_seconds(audio: AudioInput) -> float:
+    if isinstance(audio, AudioChunk):
+        return len(audio.audio) / SAMPLE_RATE
+    if isinstance(audio, np.ndarray):
+        return len(audio) / SAMPLE_RATE
+    try:
+        return _wav_seconds(Path(audio))
+    except OSError:
+        return 0.0
+
+def segments_text(segments: Iterable[Segment]) -> str:
+    return " ".join(s.text for s in segments if s.text).strip()
 
-def ffmpeg_segment(in_path: Path, segment_seconds: int = 600) -> List[Path]:
-    tempdir = Path(tempfile.mkdtemp(prefix="segments_"))
-    pattern = tempdir / "part_%03d.wav"
-    pre = ffmpeg_preprocess(in_path)
+RE_FFMPEG_DURATION = re.compile(r"Duration:\s*(\d+):(\d{2}):(\d{2}(?:\.\d+)?)")
+
+def _file_sha256(path: Path, block: int = 1 << 20) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(block), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def _parse_ffmpeg_duration(stderr: str) -> float:
+    m = RE_FFMPEG_DURATION.search(stderr or "")
+    if not m:
+        return 0.0
+    hh, mm, ss = m.groups()
+    return int(hh) * 3600 + int(mm) * 60 + float(ss)
+
+def _wav_seconds(path: Path) -> float:
+    # PCM s16le mono 16 kHz = 32000 byte/detik (header diabaikan)
+    return max(0.0, (path.stat().st_size - 44) / 32000)
+
+def _load_audio_cache(entry: Path) -> Optional[Tuple[float, List[Path]]]:
+    try:
+        meta = json.loads((entry / "meta.json").read_text(encoding="utf-8"))
+        parts = [entry / n for n in meta["parts"]]
+        if parts and all(p.exists() for p in parts):
+            return float(meta["duration"]), parts
+    except Exception:
+        pass
+    return None
+
+# Entri cache yang sedang dipakai job di-pin dengan file ".pin-<pid>-<acak>" di dalam entri
+# (terlihat juga oleh worker gunicorn lain); prune tidak menyentuh entri ber-pin.
+# Pin milik proses yang sudah mati dianggap basi dan dibuang.
+_AUDIO_CACHE_LOCK = threading.Lock()
+
+def _pin_audio_entry(entry: Path, pins: list) -> bool:
+    pin = entry / f".pin-{os.getpid()}-{uuid.uuid4().hex}"
+    try:
+        pin.touch()
+    except OSError:
+        return False
+    pins.append(pin)
+    return True
+
+def release_audio_pins(pins: list):
+    """Lepas pin entri cache audio (dipanggil saat job selesai/gagal)."""
+    while pins:
+        pins.pop().unlink(missing_ok=True)
+
+def _audio_entry_pinned(entry: Path) -> bool:
+    pinned = False
+    for pin in entry.glob(".pin-*"):
+        pid = pin.name.split("-")[1]
+        if pid.isdigit() and pid_alive(int(pid)):
+            pinned = True
+        else:
+            pin.unlink(missing_ok=True)
+    return pinned
+
+def _prune_audio_cache(keep: Path):
+    """Hapus entri cache paling lama dipakai sampai total ≤ AUDIO_CACHE_MB; entri ber-pin dilewati."""
+    entries = []
+    for d in AUDIO_CACHE_DIR.glob("*/*"):
+        if d.is_dir() and not d.name.startswith(".") and d != keep:
+            size = sum(f.stat().st_size for f in d.iterdir() if f.is_file())
+            entries.append((d.stat().st_mtime, size, d))
+    total = sum(e[1] for e in entries) + sum(f.stat().st_size for f in keep.iterdir() if f.is_file())
+    limit = AUDIO_CACHE_MB * 1024 * 1024
+    for _, size, d in sorted(entries):
+        if total <= limit:
+            break
+        if _audio_entry_pinned(d):
+            continue  # masih dipakai job yang berjalan
+        shutil.rmtree(d, ignore_errors=True)
+        total -= size
+        log.info(f"Audio cache evict: {d}")
+
+def prepare_audio(in_path: Path, segment_seconds: int | None = None, *,
+                  pins: list | None = None) -> Tuple[float, List[Path]]:
+    """
+    Satu pemanggilan ffmpeg: probe durasi (dibaca dari log ffmpeg), resample 16 kHz mono,
+    loudnorm, dan (opsional) segmentasi. Hasil di-cache per hash isi file, jadi transkrip ulang
+    file yang sama (mis. dengan model lain) tidak perlu preprocess lagi.
+    Return (durasi_detik, [file wav]) — file milik cache, jangan dihapus pemanggil.
+    Bila `pins` (list) diberikan, entri di-pin agar tidak di-prune selama dipakai;
+    lepas dengan release_audio_pins(pins).
+    """
+    variant = f"seg{segment_seconds}" if segment_seconds else "full"
+    entry = AUDIO_CACHE_DIR / _file_sha256(in_path) / variant
+    mine: list = []
+    with _AUDIO_CACHE_LOCK:
+        if entry.is_dir() and pins is not None:
+            _pin_audio_entry(entry, mine)
+        cached = _load_audio_cache(entry)  # dicek setelah pin: prune proses lain tidak bisa menyusul
+    if cached:
+        if pins is not None:
+            pins.extend(mine)
+        os.utime(entry)  # tandai baru dipakai (LRU)
+        log.info(f"Audio cache hit: {in_path.name} ({variant})")
+        return cached
+    release_audio_pins(mine)  # entri belum ada/rusak → akan dibuat ulang
+
+    entry.parent.mkdir(parents=True, exist_ok=True)
+    tmp = Path(tempfile.mkdtemp(prefix=f".{variant}_", dir=entry.parent))
+    try:
+        cmd = [
+            "ffmpeg", "-y", "-hide_banner", "-i", str(in_path),
+            "-ac", "1", "-ar", "16000", "-vn",
+            "-af", LOUDNORM_FILTER,
+        ]
+        if segment_seconds:
+            cmd += ["-f", "segment", "-segment_time", str(segment_seconds), "-reset_timestamps", "1",
+                    str(tmp / "part_%03d.wav")]
+        else:
+            cmd += [str(tmp / "full.wav")]
+        proc = subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        parts = sorted(tmp.glob("*.wav"))
+        duration = _parse_ffmpeg_duration(proc.stderr.decode(errors="ignore")) or sum(_wav_seconds(p) for p in parts)
+        (tmp / "meta.json").write_text(
+            json.dumps({"duration": duration, "parts": [p.name for p in parts], "source": in_path.name}),
+            encoding="utf-8",
+        )
+
+        with _AUDIO_CACHE_LOCK:
+            cached = _load_audio_cache(entry)
+            if not cached:
+                shutil.rmtree(entry, ignore_errors=True)  # entri rusak/setengah jadi
+                tmp.rename(entry)
+            if pins is not None:
+                _pin_audio_entry(entry, pins)
+        if cached:
+            return cached  # job lain sudah mengisi entri yang sama lebih dulu
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    try:
+        with _AUDIO_CACHE_LOCK:
+            _prune_audio_cache(keep=entry)
+    except Exception as e:
+        log.warning(f"Gagal prune audio cache: {e}")
+    return _load_audio_cache(entry) or (0.0, [])
+
+def iter_pcm_windows(in_path: Path, window_seconds: int = STREAM_WINDOW_SECONDS) -> Iterator[np.ndarray]:
+    """
+    Decode streaming: ffmpeg menulis PCM float32 16 kHz mono (ternormalisasi) ke stdout,
+    dibaca per jendela `window_seconds` menjadi array numpy. Tidak ada file sementara;
+    memori ≈ satu jendela (600 s ≈ 38 MB).
+    """
     cmd = [
-        "ffmpeg", "-y", "-i", str(pre),
-        "-f", "segment", "-segment_time", str(segment_seconds),
-        "-c", "copy", str(pattern)
+        "ffmpeg", "-nostdin", "-hide_banner", "-loglevel", "error", "-i", str(in_path),
+        "-ac", "1", "-ar", str(SAMPLE_RATE), "-vn", "-af", LOUDNORM_FILTER,
+        "-f", "f32le", "-",
     ]
-    subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-    parts = sorted(tempdir.glob("part_*.wav"))
-    return parts
+    window_bytes = int(window_seconds) * SAMPLE_RATE * 4
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    finished = False
+    try:
+        while True:
+            buf = bytearray(window_bytes)
+            view = memoryview(buf)
+            got = 0
+            while got < window_bytes:
+                n = proc.stdout.readinto(view[got:])
+                if not n:
+                    break
+                got += n
+            if got >= 4:
+                yield np.frombuffer(buf, dtype=np.float32, count=got // 4)
+            if got < window_bytes:
+                finished = True
+                break
+    finally:
+        proc.stdout.close()
+        if not finished and proc.poll() is None:
+            proc.kill()  # konsumen berhenti lebih awal (gagal/dibatalkan)
+        err = proc.stderr.read().decode(errors="ignore")
+        proc.stderr.close()
+        proc.wait()
+    if proc.returncode != 0:
+        raise RuntimeError(f"ffmpeg decode gagal: {err.strip()[-500:]}")
+
+def iter_wav_windows(path: Path, window_seconds: int = STREAM_WINDOW_SECONDS) -> Iterator[np.ndarray]:
+    """Baca WAV PCM16 mono 16 kHz (output prepare_audio) per jendela sebagai float32."""
+    with wave.open(str(path), "rb") as wf:
+        frames = int(window_seconds) * wf.getframerate()
+        while True:
+            raw = wf.readframes(frames)
+            if not raw:
+                break
+            yield np.frombuffer(raw, dtype=np.int16).astype(np.float32) / 32768.0
+
+def iter_vad_chunks(
+    windows: Iterable[np.ndarray],
+    target_seconds: int = CHUNK_TARGET_SECONDS,
+    min_silence_ms: int = VAD_MIN_SILENCE_MS,
+) -> Iterator[AudioChunk]:
+    """
+    Segmentasi berbasis Silero VAD (bawaan faster-whisper):
+    - potong hanya di jeda, bukan di tengah kata;
+    - jeda panjang dibuang sebelum decode;
+    - tiap bagian berisi ±`target_seconds` detik *ucapan* → beban worker seimbang.
+    Bekerja per jendela streaming; ucapan yang terpotong di ujung jendela dibawa ke jendela berikutnya.
+    """
+    from faster_whisper.vad import VadOptions, get_speech_timestamps
+
+    opts = VadOptions(min_silence_duration_ms=min_silence_ms, speech_pad_ms=200)
+    target = int(target_seconds) * SAMPLE_RATE
+    max_carry = 2 * target                      # ucapan tanpa jeda sama sekali → paksa potong
+    gap = np.zeros(SAMPLE_RATE // 10, dtype=np.float32)  # 0.1 s pemisah antar potongan ucapan
+
+    carry = np.zeros(0, dtype=np.float32)
+    carry_src = 0                               # offset sampel `carry` di rekaman asli
+    pieces: List[np.ndarray] = []
+    spans: List[Tuple[int, int, int]] = []
+    acc = 0
+
+    def flush() -> AudioChunk:
+        nonlocal pieces, spans, acc
+        chunk = AudioChunk(np.concatenate(pieces), spans)
+        pieces, spans, acc = [], [], 0
+        return chunk
+
+    def add(seg: np.ndarray, src_off: int):
+        nonlocal acc
+        if pieces:
+            pieces.append(gap); acc += len(gap)
+        spans.append((acc, src_off, len(seg)))
+        pieces.append(seg); acc += len(seg)
+
+    src_pos = 0
+    it = iter(windows)
+    while True:
+        win = next(it, None)
+        final = win is None
+        buf = carry if final else (np.concatenate([carry, win]) if len(carry) else win)
+        buf_src = carry_src
+        if not final:
+            src_pos += len(win)
+        if len(buf) == 0:
+            if final:
+                break
+            continue
+
+        stamps = get_speech_timestamps(buf, opts)
+        carry, carry_src = np.zeros(0, dtype=np.float32), src_pos
+        if not final and stamps and stamps[-1]["end"] >= len(buf) - SAMPLE_RATE // 2:
+            # ucapan terakhir menyentuh ujung jendela → mungkin belum selesai, tahan
+            hold = stamps[-1]
+            if len(buf) - hold["start"] <= max_carry:
+                stamps.pop()
+                carry, carry_src = buf[hold["start"]:], buf_src + hold["start"]
+            else:
+                stamps[-1] = {"start": hold["start"], "end": len(buf)}  # terlalu panjang: paksa potong
+
+        for st in stamps:
+            add(buf[st["start"]:st["end"]], buf_src + st["start"])
+            if acc >= target:
+                yield flush()
+        if final:
+            break
+
+    if pieces:
+        yield flush()
 
 # --- Whisper/Faster-Whisper (AUTO GPU → CPU fallback) ---
-_MODEL_CACHE: dict = {}
+# key = (model_size, device, compute_type, cpu_threads, replica)
+def _load_whisper(key: tuple):
+    model_size, device, compute_type, cpu_threads, _ = key
+    return WhisperModel(model_size, device=device, compute_type=compute_type, cpu_threads=cpu_threads)
+
+MODEL_MANAGER = ModelManager(
+    loader=_load_whisper,
+    mem_of=lambda key: MODEL_MEM_MB.get(key[0], MODEL_MEM_MB["medium"]),
+    mem_budget_mb=MODEL_CACHE_MB,
+)
 
-def _get_model_cached(model_size: str, device: str, compute_type: str):
-    key = (model_size, device, compute_type)
-    if key not in _MODEL_CACHE:
-        _MODEL_CACHE[key] = WhisperModel(model_size, device=device, compute_type=compute_type)
-    return _MODEL_CACHE[key]
+DOMAIN_PROMPT = (
+    "Sebayu FM, Diskominfo, Tegal, Slawi, Brebes, "
+    "Berita Pagi, Musik Santai, Relaks Malam, Sabtu Ceria, Pemkab, notulensi rapat, agenda, keputusan."
+)
+
+def _lease_model(model_size: str, device: str, compute_type: str, cpu_threads: int = 0, replica: int = 0):
+    """`with _lease_model(...) as model:` — model tidak dievict MODEL_MANAGER selama dipakai."""
+    return MODEL_MANAGER.lease((model_size, device, compute_type, cpu_threads, replica))
+
+def preload_models(sizes: List[str] | None = None):
+    """Muat model di background saat start supaya unggahan pertama tidak menunggu load."""
+    sizes = WHISPER_PRELOAD if sizes is None else sizes
+    device, compute_type = _resolve_device()
+    if device == "cuda" and not _cuda_available():
+        device, compute_type = "cpu", "int8"
+    elif device == "cpu":
+        compute_type = "int8"
+    keys = []
+    for m in (m for m in sizes if m in MODEL_MEM_MB):
+        if device == "cpu" and (WHISPER_POOL or "thread").lower() == "thread":
+            # kunci persis yang di-lease jalur chunk paralel (_worker_model): satu per replika worker
+            workers, threads = _chunk_pool_plan(os.cpu_count() or 1)
+            keys += [(m, "cpu", "int8", threads, r) for r in range(workers)]
+        keys.append((m, device, compute_type, 0, 0))  # jalur berurutan / GPU (_model_for_run)
+    # jangan preload melebihi anggaran: model yang dimuat belakangan akan mengevict yang awal
+    budget, fit = MODEL_MANAGER.mem_budget_mb, []
+    for k in keys:
+        if budget > 0 and sum(MODEL_MEM_MB[f[0]] for f in fit) + MODEL_MEM_MB[k[0]] > budget:
+            break
+        fit.append(k)
+    if fit:
+        log.info(f"Preload model: {len(fit)} instance ({', '.join(sorted({k[0] for k in fit}))}, {device}/{compute_type})")
+    return MODEL_MANAGER.preload(fit)
 
 def choose_model(duration_sec: float, mode: str, manual_choice: str) -> str:
     if mode == "manual" and manual_choice in {"tiny", "base", "small", "medium"}:
@@ -89,111 +448,384 @@ def choose_model(duration_sec: float, mode: str, manual_choice: str) -> str:
         return "medium"
     return "small"
 
-def run_faster_whisper(audio_file: Path, model_size: str) -> str:
-    """
-    Auto-detect GPU:
-      - Coba CUDA + compute_type (default: float16 / via env)
-      - Kalau gagal → fallback ke CPU int8
-    Bisa dipaksa via env (opsional, jika didefinisikan di config.py):
-      WHISPER_DEVICE=auto|cuda|cpu
-      WHISPER_COMPUTE=float16|int8_float16|int8
-    """
+def _resolve_device() -> Tuple[str, str]:
+    """Baca preferensi device/compute dari env → (device, compute_type)."""
     user_device = (WHISPER_DEVICE or "auto").lower()
     user_compute = (WHISPER_COMPUTE or "float16").lower()
-
     device = "cuda" if user_device not in {"cpu", "cuda"} else user_device
     compute_type = user_compute if user_compute in {"float16", "int8_float16", "int8"} else "float16"
+    return device, compute_type
 
-    model = None
-    if device == "cuda":
-        try:
-            model = _get_model_cached(model_size, "cuda", compute_type)
-            log.info(f"WhisperModel loaded on CUDA ({compute_type})")
-        except Exception as e:
-            log.warning(f"GPU unavailable ({e}); falling back to CPU int8")
-            model = _get_model_cached(model_size, "cpu", "int8")
-    else:
-        model = _get_model_cached(model_size, "cpu", "int8")
-        log.info("WhisperModel loaded on CPU (int8)")
+def _cuda_available() -> bool:
+    try:
+        import ctranslate2
+        return ctranslate2.get_cuda_device_count() > 0
+    except Exception:
+        return False
 
-    domain_prompt = (
-        "Sebayu FM, Diskominfo, Tegal, Slawi, Brebes, "
-        "Berita Pagi, Musik Santai, Relaks Malam, Sabtu Ceria, Pemkab, notulensi rapat, agenda, keputusan."
-    )
+def _transcribe_segments(model, audio: AudioInput, *, offset: float = 0.0, part: int = 0, on_segment=None) -> List[Segment]:
+    """
+    Jalankan Whisper dan kumpulkan segmen satu per satu (generator faster-whisper),
+    memanggil `on_segment(segment, fraksi_bagian)` begitu tiap segmen jadi.
+    """
+    if isinstance(audio, AudioChunk):
+        data, vad = audio.audio, False  # jeda sudah dibuang oleh iter_vad_chunks
+    else:
+        data, vad = (audio if isinstance(audio, np.ndarray) else str(audio)), True
+    length = _audio_seconds(audio) or 1.0
     segments, _ = model.transcribe(
-        str(audio_file),
+        data,
         language="id",
-        vad_filter=True,
+        vad_filter=vad,
         vad_parameters=dict(min_silence_duration_ms=500),
         beam_size=5,           # untuk speed bisa turunkan ke 1–3
         best_of=5,             # untuk speed bisa turunkan ke 1–2
         condition_on_previous_text=False,
-        initial_prompt=domain_prompt,
+        initial_prompt=DOMAIN_PROMPT,
     )
-    texts = [seg.text.strip() for seg in segments if getattr(seg, "text", None)]
-    return " ".join(texts).strip()
+    out: List[Segment] = []
+    for seg in segments:
+        text = (getattr(seg, "text", None) or "").strip()
+        if not text:
+            continue
+        if isinstance(audio, AudioChunk):
+            start, end = audio.source_time(seg.start), audio.source_time(seg.end)
+        else:
+            start, end = offset + seg.start, offset + seg.end
+        item = Segment(start, end, text, float(getattr(seg, "avg_logprob", 0.0) or 0.0), part)
+        out.append(item)
+        if on_segment:
+            on_segment(item, min(1.0, seg.end / length))
+    return out
+
+@contextmanager
+def _model_for_run(model_size: str):
+    device, compute_type = _resolve_device()
+    with ExitStack() as stack:
+        model = None
+        if device == "cuda":
+            try:
+                model = stack.enter_context(_lease_model(model_size, "cuda", compute_type))
+                log.info(f"WhisperModel loaded on CUDA ({compute_type})")
+            except Exception as e:
+                log.warning(f"GPU unavailable ({e}); falling back to CPU int8")
+        if model is None:
+            model = stack.enter_context(_lease_model(model_size, "cpu", "int8"))
+            log.info("WhisperModel loaded on CPU (int8)")
+        yield model
+
+def run_faster_whisper_segments(audio: AudioInput, model_size: str, *, offset: float = 0.0, part: int = 0,
+                                on_segment=None) -> List[Segment]:
+    """Seperti run_faster_whisper, tetapi mengembalikan segmen bertimestamp (lihat Segment)."""
+    with _model_for_run(model_size) as model:
+        return _transcribe_segments(model, audio, offset=offset, part=part, on_segment=on_segment)
+
+def run_faster_whisper(audio_file: AudioInput, model_size: str) -> str:
+    """
+    Auto-detect GPU:
+      - Coba CUDA + compute_type (default: float16 / via env)
+      - Kalau gagal → fallback ke CPU int8
+    Bisa dipaksa via env (opsional, jika didefinisikan di config.py):
+      WHISPER_DEVICE=auto|cuda|cpu
+      WHISPER_COMPUTE=float16|int8_float16|int8
+    """
+    return segments_text(run_faster_whisper_segments(audio_file, model_size))
+
+# --- Transkripsi paralel per bagian (CPU) ---
+# Tiap worker (thread/proses) memegang WhisperModel sendiri dengan cpu_threads terbatas,
+# supaya N worker × cpu_threads ≈ jumlah core dan tidak saling berebut.
+# Replika model worker dibagi per proses: id replika diambil dari free-list global (id terkecil yang
+# bebas) dan dikembalikan saat pool selesai, jadi dua job paralel tidak pernah memakai replika yang sama,
+# sedangkan job berikutnya memakai ulang replika (yang masih resident di MODEL_MANAGER).
+_WORKER_LOCAL = threading.local()
+_REPLICA_LOCK = threading.Lock()
+_REPLICAS_IN_USE: set = set()
+
+def _acquire_replicas(n: int) -> List[int]:
+    with _REPLICA_LOCK:
+        ids = []
+        r = 0
+        while len(ids) < n:
+            if r not in _REPLICAS_IN_USE:
+                _REPLICAS_IN_USE.add(r)
+                ids.append(r)
+            r += 1
+        return ids
+
+def _release_replicas(ids: Iterable[int]):
+    with _REPLICA_LOCK:
+        _REPLICAS_IN_USE.difference_update(ids)
+
+def _init_worker_slot(slots: "queue.SimpleQueue[int]"):
+    _WORKER_LOCAL.slot = slots.get_nowait()
+
+def _chunk_pool_plan(n_parts: int) -> Tuple[int, int]:
+    """Hitung (jumlah worker, cpu_threads per worker) dari config & jumlah core."""
+    cores = os.cpu_count() or 1
+    workers = WHISPER_CHUNK_WORKERS if WHISPER_CHUNK_WORKERS > 0 else max(1, cores // 4)
+    workers = max(1, min(workers, n_parts, cores))
+    threads = WHISPER_CPU_THREADS if WHISPER_CPU_THREADS > 0 else max(1, cores // workers)
+    return workers, threads
+
+def _worker_model(model_size: str, cpu_threads: int):
+    return _lease_model(model_size, "cpu", "int8", cpu_threads, getattr(_WORKER_LOCAL, "slot", 0))
+
+def _transcribe_part(index: int, audio: AudioInput, offset: float, model_size: str, cpu_threads: int,
+                     on_segment=None) -> Tuple[int, List[Segment]]:
+    """Unit kerja pool; harus top-level agar bisa di-pickle untuk ProcessPoolExecutor."""
+    with _worker_model(model_size, cpu_threads) as model:
+        return index, _transcribe_segments(model, audio, offset=offset, part=index + 1, on_segment=on_segment)
+
+def transcribe_parts_parallel(parts: Iterable[Tuple[AudioInput, float]], model_size: str, progress=None, *,
+                              total: int, on_segment=None) -> List[List[Segment]]:
+    """
+    Transkripsi banyak bagian (audio, offset_detik) sekaligus di pool worker;
+    hasil dikembalikan sesuai urutan bagian.
+    `parts` boleh generator (mis. jendela PCM streaming): paling banyak 2× jumlah worker
+    bagian yang ditahan di memori sekaligus.
+    Thread pool: segmen dilaporkan live lewat `on_segment`; process pool: saat bagian selesai.
+    WHISPER_POOL=thread|process, WHISPER_CHUNK_WORKERS, WHISPER_CPU_THREADS (lihat config.py).
+    """
+    from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, wait, FIRST_COMPLETED
+
+    n = max(1, total)
+    workers, threads = _chunk_pool_plan(n)
+    use_process = (WHISPER_POOL or "thread").lower() == "process"
+    pool_cls = ProcessPoolExecutor if use_process else ThreadPoolExecutor
+    log.info(f"Transkripsi paralel: ~{n} bagian, {workers} worker × {threads} thread ({pool_cls.__name__})")
+
+    results: Dict[int, List[Segment]] = {}
+    pending = set()
+    fractions: Dict[int, float] = {}   # posisi audio per bagian (0..1)
+    frac_lock = threading.Lock()
+
+    def report(msg: str):
+        with frac_lock:
+            done_share = sum(fractions.values())
+        if progress: progress(30 + int(55*min(done_share, n)/n), msg)
+
+    def live(index: int):
+        def cb(seg: Segment, frac: float):
+            with frac_lock:
+                fractions[index] = frac
+            if on_segment: on_segment(seg)
+            report(f"Transkrip paralel: {len(results)}/{n} bagian selesai")
+        return cb
+
+    def collect(done_set):
+        for fut in done_set:
+            idx, segs = fut.result()
+            results[idx] = segs
+            with frac_lock:
+                fractions[idx] = 1.0
+            if use_process and on_segment:
+                for seg in segs:
+                    on_segment(seg)
+            report(f"Selesai bagian {idx+1} ({len(results)}/{n})")
+
+    # proses worker punya MODEL_MANAGER sendiri; replika hanya relevan untuk thread pool
+    replicas = [] if use_process else _acquire_replicas(workers)
+    slots: "queue.SimpleQueue[int]" = queue.SimpleQueue()
+    for r in replicas:
+        slots.put(r)
+    slot_init = {} if use_process else {"initializer": _init_worker_slot, "initargs": (slots,)}
+    try:
+        with pool_cls(max_workers=workers, **slot_init) as pool:
+            try:
+                for i, (audio, offset) in enumerate(parts):
+                    if len(pending) >= workers * 2:
+                        done_set, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        collect(done_set)
+                    cb = None if use_process else live(i)
+                    pending.add(pool.submit(_transcribe_part, i, audio, offset, model_size, threads, cb))
+                while pending:
+                    done_set, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done_set)
+            except BaseException:
+                # gagal/dibatalkan: jangan kerjakan bagian yang belum mulai
+                for fut in pending:
+                    fut.cancel()
+                raise
+    finally:
+        _release_replicas(replicas)  # keluar dari `with` = semua thread worker sudah berhenti
+    return [results[i] for i in sorted(results)]
+
+def _with_offsets(parts: Iterable[AudioInput], step: float) -> Iterator[Tuple[AudioInput, float]]:
+    """Pasangkan tiap bagian dengan offset detiknya di rekaman asli (bagian berdurasi tetap)."""
+    for i, p in enumerate(parts):
+        yield p, (0.0 if isinstance(p, AudioChunk) else i * step)
 
 def transcribe_audio_pipeline(
     audio_path: Path,
     mode: str = "auto",
     manual_choice: str = "small",
     do_chunk: bool = False,
-    progress=None
+    progress=None,
+    on_segment=None,
 ) -> str:
-    duration = ffprobe_duration(audio_path)
+    """
+    Transkripsi lengkap. `on_segment(Segment)` dipanggil untuk tiap segmen begitu dihasilkan
+    (urutan antar bagian bisa acak di mode paralel); progres dihitung dari posisi audio.
+    """
+    pins: list = []  # entri cache audio yang dipakai job ini, di-pin sampai transkripsi selesai
+    try:
+        return _transcribe_audio_pipeline(audio_path, mode, manual_choice, do_chunk, progress, on_segment, pins)
+    finally:
+        release_audio_pins(pins)
+
+def _transcribe_audio_pipeline(audio_path: Path, mode: str, manual_choice: str, do_chunk: bool,
+                               progress, on_segment, pins: list) -> str:
+    vad_chunk = do_chunk and VAD_CHUNKING
+    segment_seconds = 600 if (do_chunk and not vad_chunk) else None
+    if (AUDIO_DECODE or "cache").lower() == "stream":
+        # decode langsung ke memori; durasi cukup dari ffprobe (tanpa decode)
+        duration = ffprobe_duration(audio_path)
+        window = segment_seconds or STREAM_WINDOW_SECONDS
+        parts: Iterable[AudioInput] = iter_pcm_windows(audio_path, window)
+        n = max(1, -(-int(duration) // window))
+    else:
+        if progress: progress(15, "Preprocess audio (16 kHz, loudnorm)" + (" + segmentasi 10 menit" if segment_seconds else ""))
+        duration, parts = prepare_audio(audio_path, segment_seconds=segment_seconds, pins=pins)
+        if not parts:
+            raise RuntimeError("Preprocess audio gagal: tidak ada output dari ffmpeg")
+        window = segment_seconds or duration
+        n = len(parts)
+        if vad_chunk:
+            parts = iter_wav_windows(parts[0])
+            window = STREAM_WINDOW_SECONDS
+    if vad_chunk:
+        # potong di jeda; jumlah bagian sebenarnya baru diketahui setelah VAD (≤ perkiraan ini)
+        parts = iter_vad_chunks(parts, CHUNK_TARGET_SECONDS)
+        n = max(1, -(-int(duration) // CHUNK_TARGET_SECONDS))
+    pieces = _with_offsets(parts, window)
     if progress: progress(20, f"Durasi terdeteksi ~{duration/60:.1f} menit")
     model_size = choose_model(duration, mode, manual_choice)
     if progress: progress(25, f"Pilih model: {model_size}")
 
+    def sequential(base: int, span: int, label: str) -> List[List[Segment]]:
+        out = []
+        for i, (audio, offset) in enumerate(pieces, 1):
+            def cb(seg: Segment, frac: float, i=i):
+                if on_segment: on_segment(seg)
+                if progress:
+                    pos = min(n, i - 1 + frac)
+                    progress(base + int(span*pos/n), f"{label} {seg.end/60:.1f}/{duration/60:.1f} menit…")
+            out.append(run_faster_whisper_segments(audio, model_size, offset=offset, part=i, on_segment=cb))
+        return out
+
     if do_chunk:
-        if progress: progress(28, "Segmentasi audio (tiap 10 menit)")
-        parts = ffmpeg_segment(audio_path, segment_seconds=600)
-        n = max(1, len(parts))
-        chunks_text = []
-        try:
-            for i, p in enumerate(parts, 1):
-                share_start = 30 + int(55*(i-1)/n)
-                share_end   = 30 + int(55*i/n)
-                if progress: progress(share_start, f"Transkrip bagian {i}/{n}…")
-                t = run_faster_whisper(p, model_size)
-                chunks_text.append(f"[Bagian {i}] {t}")
-                if progress: progress(share_end, f"Selesai bagian {i}/{n}")
-            full_text = "\n".join(chunks_text).strip()
-        finally:
-            if parts:
-                shutil.rmtree(parts[0].parent, ignore_errors=True)
+        device, _ = _resolve_device()
+        on_cpu = device == "cpu" or not _cuda_available()
+        if on_cpu and n > 1:
+            # CPU: paralel di pool worker, urutan teks tetap dijaga
+            if progress: progress(30, f"Transkrip {n} bagian secara paralel…")
+            per_part = transcribe_parts_parallel(pieces, model_size, progress=progress, total=n, on_segment=on_segment)
+        else:
+            # GPU (satu model di VRAM) atau hanya satu bagian: berurutan
+            per_part = sequential(30, 55, "Transkrip bagian per bagian:")
+        full_text = "\n".join(f"[Bagian {i}] {segments_text(segs)}" for i, segs in enumerate(per_part, 1)).strip()
         if progress: progress(88, "Menggabungkan teks")
         return full_text
     else:
-        if progress: progress(28, "Preprocess audio")
-        pre = ffmpeg_preprocess(audio_path)
         if progress: progress(35, "Transkripsi (tanpa potong)…")
-        text = run_faster_whisper(pre, model_size)
+        per_part = sequential(35, 50, "Transkripsi")
+        text = " ".join(segments_text(segs) for segs in per_part if segs).strip()
         if progress: progress(88, "Finalisasi teks")
         return text
 
 # --- Summarization lokal (tanpa OpenAI) ---
-def local_summarize_bullets(text: str, max_sentences: int = 18) -> str:
-    sents = re.split(r'(?<=[.!?])\s+|\n{2,}', text)
-    keywords = [
-        "keputusan","tindak lanjut","action","deadline","anggaran","solusi","usulan",
-        "disepakati","menyetujui","ditetapkan","menetapkan","menugaskan","PIC","owner",
-        "target","paling lambat","KUA","PPAS","TAPD","RKPD"
-    ]
-    scored = []
-    for s in sents:
-        s2 = s.strip()
-        if not s2: continue
-        score = len(s2)
-        low = s2.lower()
-        score += sum(28 for k in keywords if k in low)
-        scored.append((score, s2))
-    scored.sort(reverse=True, key=lambda x: x[0])
-    bullets = [f"- {s}" for _, s in scored[:max_sentences]]
+RE_SUMMARY_SPLIT = re.compile(r'(?<=[.!?])\s+|\n{2,}')
+
+def _summary_sentences(text: str) -> list[str]:
+    return [s2 for s2 in (s.strip() for s in RE_SUMMARY_SPLIT.split(text)) if s2]
+
+def _score_sentence(s2: str) -> int:
+    low = s2.lower()
+    return len(s2) + sum(28 for k in SUMMARY_KEYWORDS if k in low)
+
+def _bullets_from_scored(scored: Iterable[tuple[int, str]], max_sentences: int) -> str:
+    # urut skor menurun, seri → urutan asli (sama dengan sort stabil)
+    top = heapq.nsmallest(max_sentences, enumerate(scored), key=lambda e: (-e[1][0], e[0]))
+    bullets = [f"- {s}" for _, (_, s) in top]
     if not bullets:
         return "- (tidak cukup konten untuk diringkas)"
     return "\n".join(bullets)
 
+def local_summarize_bullets(text: str, max_sentences: int = 18) -> str:
+    return _bullets_from_scored(((_score_sentence(s), s) for s in _summary_sentences(text)), max_sentences)
+
+# --- Hasil turunan per paragraf (incremental) ---
+# Teks dipecah jadi paragraf di batas kalimat (RE_SUMMARY_SPLIT, juga batas kalimat clean_text_id).
+# Batas paragraf ditentukan isi (content-defined): kalimat yang crc32-nya kelipatan PARAGRAPH_SPLIT_EVERY
+# menutup paragraf. Edit di satu tempat hanya mengubah paragraf itu; paragraf lain tetap kena cache.
+PARAGRAPH_SPLIT_EVERY = 8
+PARAGRAPH_MAX_SENTENCES = 32
+ARTIFACTS_VERSION = f"1:{TEXTCLEAN_RULES}:" + hashlib.sha256(repr(SUMMARY_KEYWORDS).encode()).hexdigest()[:8]
+
+def split_paragraphs(text: str) -> List[str]:
+    """
+    Paragraf = kalimat berurutan digabung dengan "\n\n", sehingga
+    clean_text_id(text) == "\n".join(bersih tiap paragraf, yang tidak kosong) dan
+    kalimat ringkasan tiap paragraf == kalimat ringkasan teks utuh.
+    """
+    paras, cur = [], []
+    for s in RE_SUMMARY_SPLIT.split(text):
+        if not s.strip():
+            continue
+        cur.append(s)
+        if zlib.crc32(s.encode("utf-8")) % PARAGRAPH_SPLIT_EVERY == 0 or len(cur) >= PARAGRAPH_MAX_SENTENCES:
+            paras.append("\n\n".join(cur)); cur = []
+    if cur:
+        paras.append("\n\n".join(cur))
+    return paras
+
+def paragraph_artifacts(text: str) -> List[Tuple[str, str, list]]:
+    """
+    [(paragraf, teks_bersih, [skor kalimat])] — dari cache DB per hash isi paragraf;
+    hanya paragraf baru/berubah yang dihitung.
+    """
+    paras = split_paragraphs(text or "")
+    hashes = [hashlib.sha256(f"{ARTIFACTS_VERSION}\0{p}".encode("utf-8")).hexdigest() for p in paras]
+    try:
+        cached = load_paragraph_cache(sorted(set(hashes)))
+    except Exception as e:
+        log.warning(f"Gagal baca cache paragraf: {e}")
+        cached = {}
+    fresh = {}
+    for h, p in zip(hashes, paras):
+        if h not in cached and h not in fresh:
+            fresh[h] = (clean_text_id(p), [_score_sentence(s) for s in _summary_sentences(p)])
+    if fresh:
+        try:
+            save_paragraph_cache(ARTIFACTS_VERSION, [(h, c, sc) for h, (c, sc) in fresh.items()])
+        except Exception as e:
+            log.warning(f"Gagal simpan cache paragraf: {e}")
+        log.info(f"Paragraf dihitung ulang: {len(fresh)}/{len(paras)}")
+    return [(p, *(cached.get(h) or fresh[h])) for h, p in zip(hashes, paras)]
+
+def incremental_clean_text(text: str, artifacts=None) -> str:
+    """Setara clean_text_id(text), tapi paragraf yang tidak berubah diambil dari cache."""
+    if not text or not text.strip():
+        return text
+    artifacts = paragraph_artifacts(text) if artifacts is None else artifacts
+    return "\n".join(c for _, c, _ in artifacts if c)
+
+def incremental_summarize_bullets(text: str, max_sentences: int = 18, artifacts=None) -> str:
+    """Setara local_summarize_bullets(text), skor kalimat diambil dari cache paragraf."""
+    artifacts = paragraph_artifacts(text) if artifacts is None else artifacts
+    scored = (
+        (sc, s)
+        for p, _, scores in artifacts
+        for sc, s in zip(scores, _summary_sentences(p))
+    )
+    return _bullets_from_scored(scored, max_sentences)
+
+def summarize_bullets(text: str, max_sentences: int = 18, mode: str = SUMMARY_MODE, artifacts=None) -> str:
+    """Ringkasan bullet lokal sesuai `mode` (keyword|tfidf|textrank, lihat config.SUMMARY_MODE)."""
+    if mode == "keyword":
+        return incremental_summarize_bullets(text, max_sentences, artifacts=artifacts)
+    return summarize_vector(text or "", max_sentences=max_sentences, mode=mode)
+
 # ====== Klasifikasi Lokal Notulen (tanpa OpenAI) ======
 RE_DATE = re.compile(
     r"\b(\d{1,2}[/\-.]\d{1,2}([/\-.]\d{2,4})?|"
@@ -337,45 +969,54 @@ BASE_KEYSETS = {
     ]
 }
 
-def _compile_keysets(custom: Dict[str, List[str]]|None) -> Dict[str, List[re.Pattern]]:
-    """Gabungkan base + custom ke regex terkompilasi."""
+RE_OWNER_VERB = re.compile(r"\b([A-Z][a-zA-Z_. ]{1,40})\b[^.]{0,30}\b(akan|agar|diminta|ditugaskan)\b")
+RE_CANDIDATE_SPLIT = re.compile(r"(?:\n{2,}|(?<=[.!?])\s+)")
+
+def _keyset_signature(custom: Dict[str, List[str]]|None) -> tuple:
+    if not custom:
+        return ()
+    return tuple(sorted((k, tuple(str(p) for p in arr)) for k, arr in custom.items() if arr))
+
+@lru_cache(maxsize=64)
+def _keyset_matcher(signature: tuple) -> KeywordMatcher:
+    """Matcher base + custom, di-cache per signature kata kunci custom (lihat _compile_keysets)."""
     merged: Dict[str, List[str]] = {k: list(v) for k, v in BASE_KEYSETS.items()}
-    if custom:
-        for k, arr in custom.items():
-            if not arr: continue
-            merged.setdefault(k, [])
-            merged[k].extend(arr)
-    return {k: [re.compile(p, re.I) for p in v] for k, v in merged.items()}
+    for k, arr in signature:
+        merged.setdefault(k, []).extend(arr)
+    rules = [(k, 1.0, p) for k, v in merged.items() for p in v]
+    rules.append(("keputusan", 1.6, RE_DECISION_VERB.pattern))
+    rules.append(("tindak_lanjut", 1.1, RE_ACTION_VERB.pattern))
+    return KeywordMatcher(rules)
+
+def _compile_keysets(custom: Dict[str, List[str]]|None) -> KeywordMatcher:
+    """Gabungkan base + custom jadi satu KeywordMatcher (dikompilasi sekali per set kata kunci)."""
+    return _keyset_matcher(_keyset_signature(custom))
 
 def _split_candidates(text: str) -> list[str]:
-    parts = re.split(r"(?:\n{2,}|(?<=[.!?])\s+)", text)
+    parts = RE_CANDIDATE_SPLIT.split(text)
     return [p.strip("•- \t\r") for p in parts if p and p.strip()]
 
 def _infer_owner(line: str) -> str | None:
     m = RE_OWNER.search(line)
     if m: return m.group(2).strip()
-    m2 = re.search(r"\b([A-Z][a-zA-Z_. ]{1,40})\b[^.]{0,30}\b(akan|agar|diminta|ditugaskan)\b", line)
+    m2 = RE_OWNER_VERB.search(line)
     return m2.group(1).strip() if m2 else None
 
 def _infer_due(line: str) -> str | None:
     m = RE_DATE.search(line)
     return m.group(0) if m else None
 
-def _classify_line(line: str, COMPILED: Dict[str, List[re.Pattern]]) -> tuple[str, float, dict]:
-    score = {k: 0.0 for k in COMPILED}
-    for k, regs in COMPILED.items():
-        for rgx in regs:
-            if rgx.search(line): score[k] += 1.0
-    if RE_DECISION_VERB.search(line): score["keputusan"] += 1.6
-    if RE_ACTION_VERB.search(line):   score["tindak_lanjut"] += 1.1
-    if _infer_due(line):              score["tindak_lanjut"] += 0.8
-    if _infer_owner(line):            score["tindak_lanjut"] += 0.8
+def _classify_line(line: str, matcher: KeywordMatcher) -> tuple[str, float, dict]:
+    score = matcher.scores(line)
+    owner, due = _infer_owner(line), _infer_due(line)
+    if due:   score["tindak_lanjut"] += 0.8
+    if owner: score["tindak_lanjut"] += 0.8
 
     label = max(score, key=score.get)
     return label, score[label], {
         "text": line.strip(),
-        "owner": _infer_owner(line),
-        "due_date": _infer_due(line),
+        "owner": owner,
+        "due_date": due,
         "confidence_local": round(score[label], 2)
     }
 
@@ -384,50 +1025,109 @@ def extract_minutes_rule_based(
     summary: str | None,
     *,
     max_each: int = 30,
-    custom_keywords: Dict[str, List[str]]|None = None
+    custom_keywords: Dict[str, List[str]]|None = None,
+    summary_mode: str = SUMMARY_MODE
 ) -> dict:
     """
     Ekstraksi kategori notulen berbasis aturan + kata kunci custom.
     """
-    COMPILED = _compile_keysets(custom_keywords)
+    matcher = _compile_keysets(custom_keywords)
 
     if summary and summary.strip() and not summary.strip().startswith("[Gagal"):
         source_text = summary
     else:
-        source_text = local_summarize_bullets(transcript, max_sentences=30)
+        source_text = (local_summarize_bullets(transcript, max_sentences=30) if summary_mode == "keyword"
+                       else summarize_vector(transcript or "", max_sentences=30, mode=summary_mode))
 
-    buckets = {k: [] for k in ["keputusan","tindak_lanjut","isu","arahan","catatan"]}
-    ranked: list[tuple[str,float,dict]] = []
-    for ln in _split_candidates(source_text):
-        label, sc, payload = _classify_line(ln, COMPILED)
-        ranked.append((label, sc, payload))
+    return fill_minutes_buckets(
+        (_classify_line(ln, matcher) for ln in _split_candidates(source_text)), max_each
+    )
 
-    for label, _, pay in sorted(ranked, key=lambda x: x[1], reverse=True):
-        if len(buckets[label]) < max_each and pay["text"] not in [p["text"] for p in buckets[label]]:
-            buckets[label].append(pay)
+RE_NEAR_DUP = re.compile(r"[\W_]+")
+MINUTES_LABELS = ["keputusan", "tindak_lanjut", "isu", "arahan", "catatan"]
 
-    return buckets
+def _near_dup_key(text: str) -> str:
+    """Teks ternormalisasi (huruf kecil, tanpa tanda baca/spasi ganda) untuk deteksi hampir-duplikat."""
+    return RE_NEAR_DUP.sub(" ", text.lower()).strip()
+
+def fill_minutes_buckets(classified: Iterable[tuple[str, float, dict]], max_each: int) -> dict:
+    """
+    Isi bucket per kategori: skor tertinggi dulu (seri → urutan asli), maks `max_each`,
+    hampir-duplikat dibuang (yang skornya lebih tinggi/lebih awal yang disimpan).
+    O(n) untuk dedup (dict per kategori) + heap top-k, bukan sort penuh + scan list per kandidat.
+    """
+    best: Dict[str, Dict[str, tuple]] = {k: {} for k in MINUTES_LABELS}
+    for idx, (label, sc, pay) in enumerate(classified):
+        seen = best.get(label)
+        if seen is None:
+            continue  # kategori custom di luar bucket notulen
+        key = _near_dup_key(pay["text"])
+        cur = seen.get(key)
+        if cur is None or (-sc, idx) < cur[:2]:
+            seen[key] = (-sc, idx, pay)
+    return {
+        label: [pay for _, _, pay in heapq.nsmallest(max_each, seen.values(), key=lambda e: e[:2])]
+        for label, seen in best.items()
+    }
 
 # ===== Notulen (Minutes) Builder =====
-def build_minutes_local(transcript: str, summary: str | None, program: str, created_at: str, *, meta: dict|None=None) -> dict:
-    """Builder utama untuk halaman HTML lama (section Keputusan/Tindak Lanjut)."""
+def _minutes_custom_keywords(meta: dict | None) -> Dict[str, List[str]]:
+    m = meta if isinstance(meta, dict) else {}
+    custom = {k: m.get(f"kw_{k}", []) for k in ["keputusan", "tindak_lanjut", "isu", "arahan", "catatan"]}
+    return {k: v for k, v in custom.items() if v}
+
+MINUTES_MAX_EACH = 50  # cukup untuk builder resmi (50) & lokal (40, dipotong)
+MINUTES_CACHE_VERSION = 2  # naikkan bila aturan ekstraksi berubah → cache lama otomatis tidak terpakai
+
+def minutes_content_hash(transcript: str, summary: str | None, meta: dict | None) -> str:
+    """Kunci cache notulen: hanya input yang memengaruhi ekstraksi (teks, ringkasan, kata kunci)."""
+    payload = json.dumps(
+        [MINUTES_CACHE_VERSION, MINUTES_MAX_EACH, SUMMARY_MODE, transcript or "", summary or "",
+         _minutes_custom_keywords(meta)],
+        ensure_ascii=False, sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+def get_minutes_buckets(tid: int, transcript: str, summary: str | None, meta: dict | None) -> dict:
+    """
+    Hasil extract_minutes_rule_based untuk transkrip `tid`, dari cache DB bila hash cocok.
+    Dipakai bersama oleh halaman notulen (HTML) dan unduhan DOCX.
+    Bucket sengaja di-cache per transkrip (minutes_cache), bukan per paragraf: bucket diklasifikasi
+    dari baris ringkasan (≤ 30 baris, ringkasan tersimpan atau fallback summarize_bullets yang
+    sudah memakai skor per paragraf dari paragraph_artifacts), bukan dari paragraf transkrip, dan
+    kata kunci custom per transkrip ikut menentukan hasilnya. Bagian mahal (bersih + skor) sudah
+    inkremental; klasifikasi ulang ≤ 30 baris setelah edit murah.
+    """
+    key = minutes_content_hash(transcript, summary, meta)
+    buckets = load_minutes_cache(tid, key)
+    if buckets is None:
+        if not (summary and summary.strip() and not summary.strip().startswith("[Gagal")):
+            # sama dengan fallback di extract_minutes_rule_based, tapi mode keyword memakai cache paragraf
+            summary = summarize_bullets(transcript, max_sentences=30, mode=SUMMARY_MODE)
+        buckets = extract_minutes_rule_based(transcript, summary, max_each=MINUTES_MAX_EACH,
+                                             custom_keywords=_minutes_custom_keywords(meta),
+                                             summary_mode=SUMMARY_MODE)
+        try:
+            save_minutes_cache(tid, key, buckets)
+        except Exception as e:
+            log.warning(f"Gagal simpan cache notulen #{tid}: {e}")
+    return buckets
+
+def build_minutes_local(transcript: str, summary: str | None, program: str, created_at: str, *,
+                        meta: dict|None=None, buckets: dict|None=None) -> dict:
+    """
+    Builder utama untuk halaman HTML lama (section Keputusan/Tindak Lanjut).
+    `buckets` = hasil ekstraksi yang sudah ada (mis. dari get_minutes_buckets) agar tidak dihitung ulang.
+    """
     try:
         tanggal = datetime.strptime(created_at, "%Y-%m-%d %H:%M:%S").strftime("%A, %d %B %Y")
     except Exception:
         tanggal = created_at
 
-    custom = None
-    if meta and isinstance(meta, dict):
-        custom = {
-            "keputusan": meta.get("kw_keputusan", []),
-            "tindak_lanjut": meta.get("kw_tindak_lanjut", []),
-            "isu": meta.get("kw_isu", []),
-            "arahan": meta.get("kw_arahan", []),
-            "catatan": meta.get("kw_catatan", []),
-        }
-        custom = {k:v for k,v in custom.items() if v}
-
-    buckets = extract_minutes_rule_based(transcript, summary, max_each=40, custom_keywords=custom)
+    if buckets is None:
+        buckets = extract_minutes_rule_based(transcript, summary, max_each=40,
+                                             custom_keywords=_minutes_custom_keywords(meta))
+    buckets = {k: v[:40] for k, v in buckets.items()}
 
     return {
         "title": f"NOTULEN RAPAT {program.upper()}",
@@ -440,7 +1140,8 @@ def build_minutes_local(transcript: str, summary: str | None, program: str, crea
         "catatan":       [x["text"] for x in buckets["catatan"]],
     }
 
-def build_minutes_official(transcript: str, summary: str | None, program: str, created_at: str, *, meta: dict|None=None) -> dict:
+def build_minutes_official(transcript: str, summary: str | None, program: str, created_at: str, *,
+                           meta: dict|None=None, buckets: dict|None=None) -> dict:
     """
     Builder untuk format resmi seperti contoh dokumen DPRD:
     I ... IX, dengan fokus pada 'Hasil Rapat' (Keputusan/Tindak Lanjut).
@@ -453,15 +1154,10 @@ def build_minutes_official(transcript: str, summary: str | None, program: str, c
         hari = ""
         tanggal = created_at
 
-    custom = {
-        "keputusan": m.get("kw_keputusan", []),
-        "tindak_lanjut": m.get("kw_tindak_lanjut", []),
-        "isu": m.get("kw_isu", []),
-        "arahan": m.get("kw_arahan", []),
-        "catatan": m.get("kw_catatan", []),
-    }
-    custom = {k:v for k,v in custom.items() if v}
-    buckets = extract_minutes_rule_based(transcript, summary, max_each=50, custom_keywords=custom)
+    if buckets is None:
+        buckets = extract_minutes_rule_based(transcript, summary, max_each=50,
+                                             custom_keywords=_minutes_custom_keywords(m))
+    buckets = {k: v[:50] for k, v in buckets.items()}
 
     return {
         "header": {
@@ -491,12 +1187,13 @@ def build_minutes_official(transcript: str, summary: str | None, program: str, c
         "tanggal_display": m.get("tanggal") or tanggal
     }
 
-def build_minutes_gpt(transcript: str, summary: str | None, program: str, created_at: str, *, meta: dict|None=None) -> dict:
+def build_minutes_gpt(transcript: str, summary: str | None, program: str, created_at: str, *,
+                      meta: dict|None=None, buckets: dict|None=None) -> dict:
     """Alias ke builder lokal supaya route lama tetap kompatibel."""
-    return build_minutes_local(transcript, summary, program, created_at, meta=meta)
+    return build_minutes_local(transcript, summary, program, created_at, meta=meta, buckets=buckets)
 
 # ==== DOCX builder (format resmi) ====
-def build_docx_from_minutes(minutes: dict, meta: dict, tr: dict) -> BytesIO:
+def build_docx_from_minutes(minutes: dict, meta: dict, tr: dict, *, buckets: dict|None=None) -> BytesIO:
     """
     Versi lama (heading Keputusan/Tindak Lanjut) tetap jalan.
     Namun di bawah ini kita bikin DOCX yang tampak seperti template resmi:
@@ -507,7 +1204,8 @@ def build_docx_from_minutes(minutes: dict, meta: dict, tr: dict) -> BytesIO:
     if not isinstance(meta, dict): meta = dict(meta)
     if not isinstance(tr, dict): tr = dict(tr)
 
-    official = build_minutes_official(tr.get("transcript",""), tr.get("summary",""), tr.get("program",""), tr.get("created_at",""), meta=meta)
+    official = build_minutes_official(tr.get("transcript",""), tr.get("summary",""), tr.get("program",""), tr.get("created_at",""),
+                                      meta=meta, buckets=buckets)
 
     from docx import Document
     from docx.shared import Pt, Inches, Cm
@@ -681,10 +1379,13 @@ def build_docx_from_minutes(minutes: dict, meta: dict, tr: dict) -> BytesIO:
     bio = BytesIO(); doc.save(bio); bio.seek(0)
     return bio
 
+NOW_PLAYING = NowPlayingCache(
+    NOWPLAYING_URL, ttl=NOWPLAYING_TTL, max_stale=NOWPLAYING_MAX_STALE, timeout=NOWPLAYING_TIMEOUT,
+)
+
 def get_now_playing() -> str:
     try:
-        resp = requests.get("https://admin.sebayu.my.id/api/nowplaying/sebayu", timeout=6)
-        data = resp.json()
+        data = NOW_PLAYING.get()
         song = data["now_playing"]["song"]
         artist = song.get("artist", ""); title = song.get("title", "")
         live = data["now_playing"].get("live"); listeners = data.get("listeners", {}).get("current", 0)
@@ -694,36 +1395,160 @@ def get_now_playing() -> str:
     except Exception as e:
         return f"[Gagal ambil status: {e}]"
 
-def set_progress(job_id: str, pct: int, msg: str, *, done: bool=False, error: str|None=None, tid: int|None=None):
-    PROGRESS[job_id] = {"pct": int(pct), "msg": msg, "done": done, "error": error, "tid": tid}
+# Pub/sub progres lokal; PROGRESS jadi cache state job milik proses ini
+PROGRESS_HUB = ProgressHub(PROGRESS)
+PROGRESS_FORGET_SECONDS = 600
+
+def _forget_job_later(job_id: str):
+    """State lokal job selesai (transkrip live, seq, PROGRESS) disimpan sebentar untuk penonton
+    yang telat, lalu dibuang; sesudahnya state akhir dibaca dari tabel jobs."""
+    t = threading.Timer(PROGRESS_FORGET_SECONDS, PROGRESS_HUB.forget, args=(job_id,))
+    t.daemon = True
+    t.start()
+
+def set_progress(job_id: str, pct: int, msg: str, *, done: bool=False, error: str|None=None, tid: int|None=None,
+                 queue: int|None=None):
+    state = PROGRESS_HUB.publish(
+        job_id, {"pct": int(pct), "msg": msg, "done": done, "error": error, "tid": tid, "queue": queue}
+    )
+    if state is None:
+        return  # tidak ada perubahan → tidak perlu tulis DB / bangunkan pelanggan
+    try:
+        save_job_state(job_id, state)
+    except Exception as e:
+        log.warning(f"[{job_id}] gagal simpan state job ke DB: {e}")
     log.info(f"[{job_id}] {pct}% {msg}")
 
-def run_transcribe_job(job_id: str, save_path: Path, program: str, mode: str, manual_choice: str, do_chunk: bool, do_summary: bool):
+def get_progress(job_id: str) -> dict | None:
+    """State job: cache lokal bila job berjalan di proses ini, selain itu dari DB (lintas worker)."""
+    state = PROGRESS.get(job_id)
+    if state is not None:
+        return state
+    try:
+        return load_job_state(job_id)
+    except Exception as e:
+        log.warning(f"[{job_id}] gagal baca state job dari DB: {e}")
+        return None
+
+def iter_progress_events(job_id: str, last_seq: int = 0, *, heartbeat: float = 15.0, remote_poll: float = 2.0,
+                         missing_timeout: float = 60.0):
+    """
+    Generator frame SSE untuk satu job.
+    - Event default (`data:`) = state progres; event `segment` = potongan transkrip live.
+    - Job lokal: tidur di Condition sampai ada perubahan/segmen baru.
+    - Job di worker lain: cek DB tiap `remote_poll` detik (hanya state; transkrip live
+      hanya tersedia di worker yang menjalankan job).
+    - Frame komentar heartbeat tiap `heartbeat` detik tanpa perubahan.
+    - Selesai (return) begitu state `done` sudah terkirim. State `done` selalu dikirim, juga bila
+      seq-nya ≤ Last-Event-ID klien (klien yang reconnect setelah job selesai tetap bisa berhenti).
+    - job_id yang tidak dikenal/kedaluwarsa: setelah `missing_timeout` detik dikirim state done+error.
+    """
+    seen = last_seq
+    idle = 0.0
+    missing = 0.0
+    waiting_sent = False
+    yield "retry: 3000\n\n"
+    while True:
+        state = get_progress(job_id)
+        frames = [(seq, f"id: {seq}\nevent: segment\ndata: {json.dumps(seg)}\n\n")
+                  for seq, seg in PROGRESS_HUB.segments_since(job_id, seen)]
+        if state is None and missing >= missing_timeout:
+            gone = {"pct": 100, "msg": "Job tidak ditemukan", "done": True,
+                    "error": "Job tidak ditemukan atau sudah kedaluwarsa"}
+            yield f"data: {json.dumps(gone)}\n\n"
+            return
+        if state is None and not waiting_sent:
+            waiting_sent = True
+            yield f"data: {json.dumps({'pct': 0, 'msg': 'Menunggu…', 'done': False})}\n\n"
+        elif state is not None and (state.get("seq", 0) > seen or state.get("done")):
+            frames.append((state.get("seq", 0), f"id: {state.get('seq', 0)}\ndata: {json.dumps(state)}\n\n"))
+        if frames:
+            idle = 0.0
+            for seq, frame in sorted(frames, key=lambda f: f[0]):  # id monoton untuk Last-Event-ID
+                seen = max(seen, seq)
+                yield frame
+        if state is not None and state.get("done"):
+            return
+
+        timeout = heartbeat if PROGRESS_HUB.is_local(job_id) else min(remote_poll, heartbeat)
+        if PROGRESS_HUB.wait(job_id, seen, timeout):
+            continue
+        idle += timeout
+        if state is None:
+            missing += timeout
+        if idle >= heartbeat:
+            idle = 0.0
+            yield ": ping\n\n"
+
+def _cancel_checkpoint(job_id: str, cancel: threading.Event | None):
+    """
+    Titik cek pembatalan untuk callback progres: Event lokal (cancel dari proses ini), plus flag
+    `cancel_requested` di tabel jobs (cancel lewat worker lain) yang dicek paling sering tiap
+    JOB_CANCEL_POLL_SECONDS. Raise JobCancelled bila job diminta batal.
+    """
+    next_poll = 0.0
+
+    def check():
+        nonlocal next_poll
+        if cancel is not None and cancel.is_set():
+            raise JobCancelled()
+        now = time.monotonic()
+        if now < next_poll:
+            return
+        next_poll = now + JOB_CANCEL_POLL_SECONDS
+        try:
+            requested = job_cancel_requested(job_id)
+        except Exception as e:
+            log.warning(f"[{job_id}] gagal cek flag batal: {e}")
+            return
+        if requested:
+            if cancel is not None:
+                cancel.set()
+            raise JobCancelled()
+    return check
+
+def run_transcribe_job(job_id: str, save_path: Path, program: str, mode: str, manual_choice: str, do_chunk: bool, do_summary: bool,
+                       cancel: threading.Event|None=None, summary_mode: str = SUMMARY_MODE):
+    check_cancel = _cancel_checkpoint(job_id, cancel)
+
+    def progress(pct: int, msg: str):
+        check_cancel()  # titik cek pembatalan: setiap update progres
+        set_progress(job_id, pct, msg)
+
+    collected: List[Segment] = []
+
+    def on_segment(seg: Segment):
+        collected.append(seg)
+        PROGRESS_HUB.publish_segment(job_id, seg.as_dict())
+
     try:
-        set_progress(job_id, 10, "Mulai proses")
+        progress(10, "Mulai proses")
         full_text = transcribe_audio_pipeline(
             save_path, mode=mode, manual_choice=manual_choice, do_chunk=do_chunk,
-            progress=lambda p,m: set_progress(job_id, p, m)
+            progress=progress, on_segment=on_segment,
         )
+        # teks bersih & skor ringkasan per paragraf (di-cache; dipakai ulang saat edit/bersihkan ulang)
+        artifacts = paragraph_artifacts(full_text)
         summary_text = None
         if do_summary:
-            set_progress(job_id, 92, "Merangkum (lokal)…")
+            progress(92, f"Merangkum (lokal, {summary_mode})…")
             try:
-                summary_text = local_summarize_bullets(full_text)
+                summary_text = summarize_bullets(full_text, mode=summary_mode, artifacts=artifacts)
             except Exception as e:
                 summary_text = f"[Gagal merangkum: {e}]"
 
-        set_progress(job_id, 98, "Menyimpan ke database")
+        progress(98, "Menyimpan ke database")
         with get_db() as db:
             cur = db.execute(
                 "INSERT INTO transcripts(program, filename, transcript, created_at, summary) VALUES(?,?,?,?,?)",
                 (program, save_path.name, full_text, now_str(), summary_text),
             )
             tid = cur.lastrowid
+            save_transcript_segments(db, tid, collected)
 
             # --- Bersihkan teks & simpan ke kolom cleaned_transcript (jika ada) ---
             try:
-                cleaned = clean_text_id(full_text)
+                cleaned = incremental_clean_text(full_text, artifacts)
                 db.execute("UPDATE transcripts SET cleaned_transcript=? WHERE id=?", (cleaned, tid))
             except Exception as e:
                 log.warning(f"Gagal simpan cleaned_transcript (abaikan jika kolom belum ada): {e}")
@@ -732,32 +1557,190 @@ def run_transcribe_job(job_id: str, save_path: Path, program: str, mode: str, ma
             db.commit()
 
         set_progress(job_id, 100, "Selesai ✅", done=True, tid=tid)
+    except JobCancelled:
+        log.info(f"[{job_id}] dibatalkan saat berjalan")
+        set_progress(job_id, 100, "Dibatalkan", done=True, error="Dibatalkan oleh pengguna")
     except Exception as e:
         log.exception("Transcribe job error")
         set_progress(job_id, 100, f"Gagal: {e}", done=True, error=str(e))
+    finally:
+        _forget_job_later(job_id)
+
+# --- Bersihkan ulang seluruh arsip (mis. setelah FILLERS/REPLACEMENTS berubah) ---
+def _reclean_transcript(tid: int) -> str | None:
+    """
+    Unit kerja process pool: transkrip dibaca bertahap dari DB (iter_transcript_column) dan
+    dibersihkan per kalimat (iter_clean_text_id), jadi teks mentah tidak pernah utuh di memori dan
+    tidak dikirim lewat pickle. Return teks bersih baru, atau None bila sama dengan yang tersimpan.
+    """
+    chunks = iter_transcript_column(tid)
+    first = next(chunks, None)
+    if first is None or (not first.strip() and not any(c.strip() for c in chunks)):
+        cleaned = first or ""  # sama dengan clean_text_id untuk teks kosong/spasi
+    else:
+        cleaned = "\n".join(iter_clean_text_id(itertools.chain((first,), chunks)))
+    current = "".join(iter_transcript_column(tid, "cleaned_transcript"))
+    return None if cleaned == current else cleaned
+
+def reclean_all_transcripts(progress=None, *, workers: int = RECLEAN_WORKERS, batch: int = RECLEAN_BATCH) -> int:
+    """
+    Jalankan ulang pembersihan (streaming, _reclean_transcript) untuk semua transkrip di process pool.
+    Id dibaca per batch (keyset id); proses utama hanya memegang id dan hasil yang berubah, dan
+    hanya baris yang hasilnya berubah yang ditulis. `progress(pct, msg)` boleh melempar
+    JobCancelled untuk berhenti. Return jumlah transkrip yang diperbarui.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    workers = workers if workers > 0 else (os.cpu_count() or 1)
+    batch = max(1, batch)
+    with get_db() as db:
+        total = db.execute("SELECT COUNT(*) FROM transcripts").fetchone()[0]
+    done = updated = 0
+    last_id = 0
+    if progress: progress(0, f"Membersihkan ulang {total} transkrip ({workers} proses)")
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        while True:
+            with get_db() as db:
+                ids = [r["id"] for r in db.execute(
+                    "SELECT id FROM transcripts WHERE id > ? ORDER BY id LIMIT ?", (last_id, batch),
+                ).fetchall()]
+            if not ids:
+                break
+            last_id = ids[-1]
+            cleaned = pool.map(_reclean_transcript, ids, chunksize=max(1, len(ids) // (workers * 2)))
+            changes = [(c, tid) for tid, c in zip(ids, cleaned) if c is not None]
+            if changes:
+                with get_db() as db:
+                    db.executemany("UPDATE transcripts SET cleaned_transcript=? WHERE id=?", changes)
+                    db.commit()
+            done += len(ids)
+            updated += len(changes)
+            if progress: progress(int(100 * done / max(1, total)), f"{done}/{total} transkrip, {updated} diperbarui")
+    return updated
+
+def run_reclean_job(job_id: str, cancel: threading.Event | None = None):
+    check_cancel = _cancel_checkpoint(job_id, cancel)
+
+    def progress(pct: int, msg: str):
+        check_cancel()
+        set_progress(job_id, min(pct, 99), msg)
+
+    try:
+        updated = reclean_all_transcripts(progress)
+        set_progress(job_id, 100, f"Selesai ✅ ({updated} transkrip diperbarui)", done=True)
+    except JobCancelled:
+        set_progress(job_id, 100, "Dibatalkan", done=True, error="Dibatalkan oleh pengguna")
+    except Exception as e:
+        log.exception("Reclean job error")
+        set_progress(job_id, 100, f"Gagal: {e}", done=True, error=str(e))
+    finally:
+        _forget_job_later(job_id)
+
+def submit_reclean_job(job_id: str):
+    cancel = threading.Event()
+    TRANSCRIBE_QUEUE.submit(job_id, run_reclean_job, (job_id, cancel), priority=PRIORITY_LOW, cancel=cancel)
+
+# --- Antrean transkripsi (slot tetap, bukan thread per unggahan) ---
+def _on_queue_position(job_id: str, pos: int):
+    set_progress(job_id, 5, f"Menunggu antrean (posisi {pos})", queue=pos)
+
+def _on_queue_cancel(job_id: str):
+    set_progress(job_id, 100, "Dibatalkan", done=True, error="Dibatalkan sebelum diproses")
+    _forget_job_later(job_id)
+
+TRANSCRIBE_QUEUE = JobScheduler(
+    slots=TRANSCRIBE_SLOTS, mem_budget_mb=TRANSCRIBE_MEM_MB,
+    on_queue=_on_queue_position, on_cancel=_on_queue_cancel,
+)
+
+def estimate_job_mem_mb(mode: str, manual_choice: str, do_chunk: bool) -> int:
+    """
+    Perkiraan RAM job: model × jumlah worker (mode chunk paralel di CPU). Dihitung dari pilihan
+    model & device saja (tanpa ffprobe di request upload): mode auto dianggap model terbesar yang
+    bisa dipilih choose_model, jadi anggaran tidak pernah terlampaui.
+    """
+    model_size = choose_model(float("inf"), mode, manual_choice)  # manual: durasi tidak dipakai
+    per_model = MODEL_MEM_MB.get(model_size, MODEL_MEM_MB["medium"])
+    if do_chunk:
+        device, _ = _resolve_device()
+        if device == "cpu" or not _cuda_available():
+            workers, _ = _chunk_pool_plan(os.cpu_count() or 1)
+            return per_model * workers
+    return per_model
+
+def submit_transcribe_job(job_id: str, save_path: Path, program: str, mode: str, manual_choice: str,
+                          do_chunk: bool, do_summary: bool, *, priority: int = PRIORITY_NORMAL,
+                          summary_mode: str = SUMMARY_MODE):
+    cancel = threading.Event()
+    TRANSCRIBE_QUEUE.submit(
+        job_id, run_transcribe_job,
+        (job_id, save_path, program, mode, manual_choice, do_chunk, do_summary, cancel, summary_mode),
+        priority=priority,
+        mem_mb=estimate_job_mem_mb(mode, manual_choice, do_chunk),
+        cancel=cancel,
+    )
+
+def cancel_transcribe_job(job_id: str) -> bool:
+    """Job di proses ini dibatalkan langsung; job milik worker lain lewat flag di tabel jobs."""
+    if TRANSCRIBE_QUEUE.cancel(job_id):
+        return True
+    try:
+        return request_job_cancel(job_id)
+    except Exception as e:
+        log.warning(f"[{job_id}] gagal simpan permintaan batal: {e}")
+        return False
+
+# ===== Chatbot: intent → handler =====
+CHAT_ROUTER = IntentRouter(
+    fallback=lambda msg: "Maaf, aku belum paham. Ketik 'help' untuk bantuan.",
+    empty=lambda msg: "Halo! Ketik 'jadwal', 'siaran', 'lagu sekarang', atau 'request Judul - Artis'.",
+)
+
+@CHAT_ROUTER.intent("request", keywords=["request", "req"], prefix=True)
+def _chat_request(msg: ChatMessage) -> str:
+    return "Oke, aku catat. (Akan tersimpan saat kamu kirim.)"
+
+@CHAT_ROUTER.intent("help", exact=["help", "bantuan", "/start"], keywords=["help", "bantuan", "/start"])
+def _chat_help(msg: ChatMessage) -> str:
+    return (
+        "Perintah yang tersedia:\n"
+        "• jadwal — Lihat jadwal siaran hari ini\n"
+        "• siaran — Info program terjadwal sekarang\n"
+        "• lagu sekarang / status — Info lagu real-time dari Azuracast\n"
+        "• request Judul - Artis — Kirim request lagu\n"
+        "• help — Bantuan"
+    )
+
+@CHAT_ROUTER.intent("jadwal", keywords=["jadwal", "schedule", "acara"])
+def _chat_schedule(msg: ChatMessage) -> str:
+    return get_today_schedule_text()
+
+@CHAT_ROUTER.intent("siaran", keywords=["siaran", "program", "on air", "onair"])
+def _chat_program(msg: ChatMessage) -> str:
+    cp = current_program()
+    if cp:
+        prog, host = cp; host_s = f" oleh {host}" if host else ""
+        return f"📻 Program terjadwal sekarang: {prog}{host_s}"
+    return "Tidak ada program terjadwal saat ini."
+
+@CHAT_ROUTER.intent("lagu", keywords=["lagu", "status", "now playing", "nowplaying", "playing"])
+def _chat_now_playing(msg: ChatMessage) -> str:
+    return get_now_playing()
 
 def handle_chat_message(text: str) -> str:
-    t = (text or "").strip()
-    if not t:
-        return "Halo! Ketik 'jadwal', 'siaran', 'lagu sekarang', atau 'request Judul - Artis'."
-    lower = t.lower()
-    if lower in {"help", "bantuan", "/start"}:
-        return (
-            "Perintah yang tersedia:\n"
-            "• jadwal — Lihat jadwal siaran hari ini\n"
-            "• siaran — Info program terjadwal sekarang\n"
-            "• lagu sekarang / status — Info lagu real-time dari Azuracast\n"
-            "• request Judul - Artis — Kirim request lagu\n"
-            "• help — Bantuan"
-        )
-    if "jadwal" in lower: return get_today_schedule_text()
-    if "siaran" in lower:
-        cp = current_program()
-        if cp:
-            prog, host = cp; host_s = f" oleh {host}" if host else ""
-            return f"📻 Program terjadwal sekarang: {prog}{host_s}"
-        return "Tidak ada program terjadwal saat ini."
-    if "lagu" in lower or "status" in lower: return get_now_playing()
-    if lower.startswith("request ") or lower.startswith("req "):
-        return "Oke, aku catat. (Akan tersimpan saat kamu kirim.)"
-    return "Maaf, aku belum paham. Ketik 'help' untuk bantuan."
+    return CHAT_ROUTER.handle(text)
+
+# Request lagu: ditampung di memori lalu ditulis per batch; request sama dari user sama dalam
+# REQUEST_DEDUPE_SECONDS hanya dicatat sekali (dedupe per proses, lagu dibandingkan via kunci ternormalisasi).
+# Pengirim anonim ("web-user") tidak di-dedupe: nama itu dipakai bersama banyak pendengar.
+def _song_request_key(row: tuple) -> tuple | None:
+    return song_request_dedupe_key(row[0], row[1], row[2])
+
+REQUEST_BUFFER = WriteBehindBuffer(
+    insert_requests, max_batch=REQUEST_BATCH_SIZE, max_delay=REQUEST_FLUSH_SECONDS,
+    key_fn=_song_request_key, dedupe_window=REQUEST_DEDUPE_SECONDS, spool_path=REQUEST_SPOOL_PATH,
+)
+
+def queue_song_request(username: str, platform: str, message: str) -> bool:
+    """Catat request lagu (asinkron). False bila duplikat request yang baru saja masuk."""
+    return REQUEST_BUFFER.add((username, platform, message, "baru", now_str()))
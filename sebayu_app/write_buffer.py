@@ -0,0 +1,206 @@
+# my_flask_app/sebayu_app/write_buffer.py
+import atexit
+import json
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Hashable, List, Optional
+
+from .config import log
+from .database import pid_alive
+
+class WriteBehindBuffer:
+    """
+    Buffer tulis-belakang untuk baris kecil yang datang deras (request lagu dari chat).
+    - `add()` hanya menaruh baris di memori → latensi chat tidak tergantung commit SQLite.
+    - Satu thread flusher memanggil `flush_fn(rows)` (satu transaksi executemany) bila buffer
+      mencapai `max_batch` baris atau baris tertua sudah menunggu `max_delay` detik.
+    - Dedupe: baris dengan `key_fn(row)` sama dalam `dedupe_window` detik ditolak (`add()` → False);
+      `key_fn` → None berarti baris itu tidak di-dedupe.
+    - Flush gagal (mis. DB terkunci): baris dikembalikan ke depan buffer dan dicoba lagi.
+    - Saat proses berhenti normal (atexit) buffer di-flush; bila DB tetap gagal, baris ditulis ke
+      `spool_path` (JSON per baris). Thread flusher berikutnya mengklaim spool secara atomik
+      (rename ke `<spool>.<pid>-<acak>.replay`, jadi hanya satu worker yang menulisnya), me-replay
+      di background, dan mengulang bila DB gagal; file klaim milik proses yang sudah mati diambil alih.
+    Yang bisa hilang hanya baris ≤ max_delay detik terakhir bila proses di-kill paksa (SIGKILL).
+    """
+
+    def __init__(self, flush_fn: Callable[[List[tuple]], None], *, max_batch: int = 100,
+                 max_delay: float = 1.0, key_fn: Optional[Callable[[tuple], Hashable]] = None,
+                 dedupe_window: float = 0.0, spool_path: Optional[Path] = None):
+        self._flush_fn = flush_fn
+        self.max_batch = max(1, int(max_batch))
+        self.max_delay = max(0.0, float(max_delay))
+        self._key_fn = key_fn
+        self.dedupe_window = max(0.0, float(dedupe_window))
+        self.spool_path = Path(spool_path) if spool_path else None
+        self._cv = threading.Condition()
+        self._io_lock = threading.Lock()   # satu penulisan DB pada satu waktu; add() tidak ikut menunggu
+        self._rows: List[tuple] = []
+        self._oldest = 0.0
+        self._recent: "OrderedDict[Hashable, float]" = OrderedDict()
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+        self._claimed: List[Path] = []     # file spool yang sudah diklaim proses ini, belum berhasil ditulis
+        self._stats = {"added": 0, "deduped": 0, "flushed": 0, "batches": 0, "errors": 0, "spooled": 0,
+                       "replayed": 0}
+
+    # --- API publik ---
+    def add(self, row: tuple) -> bool:
+        """Antre satu baris; False bila duplikat dalam jendela dedupe."""
+        now = time.monotonic()
+        with self._cv:
+            self._ensure_started()
+            if self._key_fn is not None and self.dedupe_window > 0:
+                while self._recent:
+                    ts = next(iter(self._recent.values()))
+                    if now - ts < self.dedupe_window:
+                        break
+                    self._recent.popitem(last=False)
+                key = self._key_fn(row)
+                if key is not None:
+                    if key in self._recent:
+                        self._stats["deduped"] += 1
+                        return False
+                    self._recent[key] = now
+            if not self._rows:
+                self._oldest = now
+            self._rows.append(row)
+            self._stats["added"] += 1
+            closed = self._closed
+            if len(self._rows) >= self.max_batch:
+                self._cv.notify()
+        if closed and not self.flush():  # setelah close() tidak ada flusher: tulis langsung
+            with self._cv:
+                self._spool_locked()
+        return True
+
+    def flush(self) -> bool:
+        """Tulis semua baris yang masih di buffer sekarang (blocking). False bila DB gagal."""
+        with self._io_lock:
+            with self._cv:
+                rows, self._rows = self._rows, []
+            if not rows:
+                return True
+            try:
+                self._flush_fn(rows)
+            except Exception as e:
+                log.warning(f"Gagal menulis {len(rows)} baris (akan dicoba lagi): {e}")
+                with self._cv:
+                    self._rows = rows + self._rows
+                    self._stats["errors"] += 1
+                return False
+            with self._cv:
+                self._stats["flushed"] += len(rows)
+                self._stats["batches"] += 1
+            return True
+
+    def close(self):
+        """Hentikan flusher dan tulis sisa buffer (spool ke file bila DB gagal)."""
+        with self._cv:
+            self._closed = True
+            self._cv.notify_all()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=10)
+        if not self.flush():
+            with self._cv:
+                self._spool_locked()
+
+    def stats(self) -> dict:
+        with self._cv:
+            return {**self._stats, "pending": len(self._rows)}
+
+    # --- internal ---
+    def _ensure_started(self):
+        if self._thread is not None or self._closed:
+            return
+        self._thread = threading.Thread(target=self._run, daemon=True, name="write-behind")
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _run(self):
+        self._claim_spool()
+        while True:
+            if self._claimed:
+                self._replay_claimed()
+            with self._cv:
+                while not self._closed:
+                    if not self._rows:
+                        if self._claimed:  # replay gagal → coba lagi nanti
+                            self._cv.wait(max(self.max_delay, 1.0))
+                            break
+                        self._cv.wait()
+                        continue
+                    wait = self._oldest + self.max_delay - time.monotonic()
+                    if len(self._rows) < self.max_batch and wait > 0:
+                        self._cv.wait(wait)
+                        continue
+                    break
+                if self._closed:
+                    return  # sisa buffer ditulis oleh close()
+            if not self.flush():
+                with self._cv:
+                    self._cv.wait(max(self.max_delay, 1.0))  # DB sibuk/terkunci → coba lagi nanti
+
+    def _spool_locked(self):
+        if not self.spool_path:
+            log.error(f"{len(self._rows)} baris hilang: DB gagal saat shutdown dan tidak ada spool")
+            return
+        with open(self.spool_path, "a", encoding="utf-8") as f:
+            for row in self._rows:
+                f.write(json.dumps(list(row), ensure_ascii=False) + "\n")
+        log.warning(f"{len(self._rows)} baris disimpan ke {self.spool_path} untuk ditulis saat start berikutnya")
+        self._stats["spooled"] += len(self._rows)
+        self._rows = []
+
+    def _claim_spool(self):
+        """Rename spool (dan klaim proses mati) ke nama unik milik proses ini; rename itu atomik."""
+        if not self.spool_path:
+            return
+        d, name = self.spool_path.parent, self.spool_path.name
+        candidates = [self.spool_path]
+        for p in d.glob(f"{name}.*.replay"):
+            pid = p.name[len(name) + 1:].split("-", 1)[0]
+            if pid.isdigit() and int(pid) != os.getpid() and not pid_alive(int(pid)):
+                candidates.append(p)
+        for src in candidates:
+            dst = d / f"{name}.{os.getpid()}-{uuid.uuid4().hex[:8]}.replay"
+            try:
+                os.rename(src, dst)
+            except FileNotFoundError:
+                continue  # tidak ada / sudah diklaim worker lain
+            except OSError as e:
+                log.warning(f"Gagal mengklaim spool {src}: {e}")
+                continue
+            self._claimed.append(dst)
+
+    def _replay_claimed(self):
+        with self._io_lock:
+            while self._claimed:
+                path = self._claimed[0]
+                try:
+                    rows = [tuple(json.loads(ln)) for ln in path.read_text(encoding="utf-8").splitlines() if ln.strip()]
+                except ValueError as e:  # file rusak: disisihkan supaya tidak diulang terus
+                    log.error(f"Spool {path} rusak, dipindah ke .bad: {e}")
+                    path.replace(path.with_suffix(".bad"))
+                    self._claimed.pop(0)
+                    continue
+                except OSError as e:
+                    log.warning(f"Gagal membaca spool {path} (akan dicoba lagi): {e}")
+                    return
+                try:
+                    if rows:
+                        self._flush_fn(rows)
+                except Exception as e:
+                    log.warning(f"Gagal replay spool {path} (akan dicoba lagi): {e}")
+                    with self._cv:
+                        self._stats["errors"] += 1
+                    return
+                path.unlink(missing_ok=True)
+                self._claimed.pop(0)
+                with self._cv:
+                    self._stats["replayed"] += len(rows)
+                log.info(f"Spool {path.name}: {len(rows)} baris ditulis ulang")
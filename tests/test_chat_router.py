@@ -0,0 +1,71 @@
+import pytest
+
+from sebayu_app.chat_router import CHAT_FUZZY_STOPWORDS, FUZZY_MIN_LEN, IntentRouter
+
+def _make_router(**kw):
+    r = IntentRouter(fallback=lambda m: "fallback", empty=lambda m: "empty", **kw)
+    r.add("request", lambda m: m.arg, keywords=["request", "req"], prefix=True)
+    r.add("help", lambda m: "help", exact=["help", "bantuan", "/start"], keywords=["help", "bantuan", "/start"])
+    r.add("jadwal", lambda m: "jadwal", keywords=["jadwal", "schedule", "acara"])
+    r.add("siaran", lambda m: "siaran", keywords=["siaran", "program", "on air", "onair"])
+    r.add("lagu", lambda m: "lagu", keywords=["lagu", "status", "now playing", "nowplaying", "playing"])
+    return r
+
+@pytest.fixture
+def router():
+    return _make_router()
+
+@pytest.mark.parametrize("text, intent", [
+    ("jadwal", "jadwal"),
+    ("jadwalnya hari ini?", "jadwal"),
+    ("status jadwal", "lagu"),
+    ("jadwal status", "jadwal"),
+    ("lagu sekarang", "lagu"),
+    ("now playing", "lagu"),
+    ("HELP", "help"),
+    ("request Lagu - Artis", "request"),
+    ("saya mau request lagu", "lagu"),
+])
+def test_exact_routing(router, text, intent):
+    assert router.route(text).intent == intent
+
+@pytest.mark.parametrize("text, intent", [
+    ("jadwl", "jadwal"),
+    ("siarn dong", "siaran"),
+    ("statsu", "lagu"),
+    ("reqeust Kangen - Dewa 19", "request"),
+])
+def test_typo_correction(router, text, intent):
+    msg = router.route(text)
+    assert msg.intent == intent
+    assert msg.fuzzy
+
+@pytest.mark.parametrize("text", [
+    "lagi apa min?",
+    "nanti lagi ya",
+    "statis",
+    "helo min",
+    "halo admin apa kabar",
+    "bagaimana cara daftar?",
+    "cara pesan tiket",
+    "caranya gimana",
+    "bantuin dong",
+])
+def test_common_words_are_not_typos(router, text):
+    msg = router.route(text)
+    assert msg.intent is None
+    assert router.dispatch(msg) == "fallback"
+
+def test_request_argument(router):
+    msg = router.route("request  Separuh Aku - NOAH ")
+    assert (msg.intent, msg.arg) == ("request", "Separuh Aku - NOAH")
+    assert router.route("request").arg == ""
+
+def test_empty_message(router):
+    assert router.handle("   ") == "empty"
+
+@pytest.mark.parametrize("word", sorted(CHAT_FUZZY_STOPWORDS))
+def test_stopwords_are_needed(word):
+    # entri daftar hanya berguna bila kata itu memang akan dikoreksi tanpa daftar
+    assert len(word) >= FUZZY_MIN_LEN
+    assert _make_router(no_fuzzy=()).route(word).fuzzy
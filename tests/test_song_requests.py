@@ -0,0 +1,37 @@
+import pytest
+
+from sebayu_app.songs import parse_song_request, song_request_dedupe_key
+from sebayu_app.write_buffer import WriteBehindBuffer
+
+@pytest.fixture
+def buffer():
+    buf = WriteBehindBuffer(lambda rows: None, max_delay=60, dedupe_window=300,
+                            key_fn=lambda row: song_request_dedupe_key(*row[:3]))
+    yield buf
+    buf.close()
+
+@pytest.mark.parametrize("text, title, artist", [
+    ("Kangen - Dewa 19", "Kangen", "Dewa 19"),
+    ("putar lagu Separuh Aku by NOAH", "Separuh Aku", "NOAH"),
+    ("Lagu - Artis", "Lagu", "Artis"),
+    ("Sempurna", "Sempurna", ""),
+])
+def test_parse_song_request(text, title, artist):
+    req = parse_song_request(text)
+    assert (req.title, req.artist) == (title, artist)
+
+def test_same_song_is_normalized():
+    assert parse_song_request("Kangen – DEWA 19!!").key == parse_song_request("kangen - dewa 19 (live)").key
+
+def test_named_user_is_deduped(buffer):
+    assert buffer.add(("budi", "web", "Kangen - Dewa 19"))
+    assert not buffer.add(("Budi ", "web", "kangen - dewa 19"))
+    assert buffer.add(("sari", "web", "Kangen - Dewa 19"))
+    assert buffer.stats()["deduped"] == 1
+
+@pytest.mark.parametrize("name", ["web-user", "", "  "])
+def test_anonymous_requests_are_not_deduped(buffer, name):
+    assert song_request_dedupe_key(name, "web", "Kangen - Dewa 19") is None
+    assert buffer.add((name, "web", "Kangen - Dewa 19"))
+    assert buffer.add((name, "web", "Kangen - Dewa 19"))
+    assert buffer.stats()["deduped"] == 0